@@ -1,132 +1,173 @@
+import asyncio
+import functools
+import itertools
 import logging
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from deploy_portal_backend.core.cache import cache, etag_response
+from deploy_portal_backend.core.config import get_settings
 from deploy_portal_backend.models.deployment import (
     DeploymentPreviewRequest,
     DeploymentPreviewResponse,
     DeploymentApplyRequest,
     DeploymentStatus,
 )
-from deploy_portal_backend.api.routes_targets import get_target_by_id
+from deploy_portal_backend.api.routes_targets import get_target_by_id, invalidate_container_cache
 from deploy_portal_backend.services.deployment import DeploymentService
+from deploy_portal_backend.services.deployment_logs import (
+    add_deployment_log,
+    close_deployment_logs,
+    discard_deployment_logs,
+    format_log_entry,
+    read_deployment_logs,
+    subscribe_deployment_logs,
+    unsubscribe_deployment_logs,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# In-memory storage
-DEPLOYMENTS: list[DeploymentStatus] = []
-DEPLOYMENT_ID_COUNTER = 1
+settings = get_settings()
 
-# Log storage: deployment_id -> list of log entries
-DEPLOYMENT_LOGS: dict[int, list[dict[str, str]]] = {}
+# In-memory storage (oldest deployments are evicted past deployment_history_max)
+DEPLOYMENTS: OrderedDict[int, DeploymentStatus] = OrderedDict()
+_deployment_id_seq = itertools.count(1)
 
+# Built once; serializes straight to JSON bytes in pydantic-core
+_DEPLOYMENTS_ADAPTER = TypeAdapter(list[DeploymentStatus])
 
-@router.post("/deployments/preview", response_model=DeploymentPreviewResponse)
-async def preview_deployment(request: DeploymentPreviewRequest):
-    """Preview a Docker deployment (stub)."""
-    target = get_target_by_id(request.target_id)
-    if target is None:
-        raise HTTPException(status_code=404, detail="Target not found")
-    
-    if request.compose_file_path:
+# Deployments are mutated from background worker threads, so guard the
+# shared state. Critical sections only cover the dict operations.
+_deployments_lock = threading.Lock()
+
+# Dedicated pool for long-running SSH deployments so they don't occupy the
+# shared threadpool that also serves sync route handlers
+_deploy_executor = ThreadPoolExecutor(max_workers=settings.deploy_max_workers, thread_name_prefix="deploy")
+
+
+_COMPOSE_SUMMARY = "Would deploy Docker Compose stack from '{compose}' to VM {name} ({address})"
+_SINGLE_SUMMARY = (
+    "Would deploy Docker container '{container_name}' using image '{image}'{port_info} "
+    "to VM {name} ({address})"
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_preview(
+    target_id: int,
+    name: str,
+    address: str,
+    image: str | None,
+    container_name: str | None,
+    ports: str | None,
+    compose_file_path: str | None,
+) -> DeploymentPreviewResponse:
+    """Build (and memoize) the preview for a deployment request."""
+    # Built from the already-validated request and target, so skip re-validation
+    if compose_file_path:
         # Docker Compose deployment
-        summary = (
-            f"Would deploy Docker Compose stack from '{request.compose_file_path}' "
-            f"to VM {target.name} ({target.address})"
-        )
-        return DeploymentPreviewResponse(
+        return DeploymentPreviewResponse.model_construct(
             ok=True,
-            target_id=request.target_id,
-            compose_file_path=request.compose_file_path,
-            summary=summary
+            target_id=target_id,
+            compose_file_path=compose_file_path,
+            summary=_COMPOSE_SUMMARY.format(compose=compose_file_path, name=name, address=address)
         )
-    else:
-        # Single container deployment
-        port_info = f" on ports {request.ports}" if request.ports else ""
-        summary = (
-            f"Would deploy Docker container '{request.container_name}' "
-            f"using image '{request.image}'{port_info} "
-            f"to VM {target.name} ({target.address})"
-        )
-        return DeploymentPreviewResponse(
-            ok=True,
-            target_id=request.target_id,
-            image=request.image,
-            container_name=request.container_name,
-            ports=request.ports,
-            summary=summary
+    
+    # Single container deployment
+    port_info = f" on ports {ports}" if ports else ""
+    return DeploymentPreviewResponse.model_construct(
+        ok=True,
+        target_id=target_id,
+        image=image,
+        container_name=container_name,
+        ports=ports,
+        summary=_SINGLE_SUMMARY.format(
+            container_name=container_name,
+            image=image,
+            port_info=port_info,
+            name=name,
+            address=address,
         )
+    )
 
 
-def add_deployment_log(deployment_id: int, level: str, message: str):
-    """Add a log entry for a deployment."""
-    global DEPLOYMENT_LOGS
-    if deployment_id not in DEPLOYMENT_LOGS:
-        DEPLOYMENT_LOGS[deployment_id] = []
+@router.post("/deployments/preview", response_model=DeploymentPreviewResponse)
+async def preview_deployment(request: DeploymentPreviewRequest):
+    """Preview a Docker deployment (stub)."""
+    target = get_target_by_id(request.target_id)
+    if target is None:
+        raise HTTPException(status_code=404, detail="Target not found")
     
-    from datetime import datetime
-    DEPLOYMENT_LOGS[deployment_id].append({
-        "timestamp": datetime.now().isoformat(),
-        "level": level,
-        "message": message
-    })
+    return _build_preview(
+        target.id,
+        target.name,
+        target.address,
+        request.image,
+        request.container_name,
+        request.ports,
+        request.compose_file_path,
+    )
 
 
 def update_deployment_status(deployment_id: int, status: str, message: str):
     """Update deployment status in the list."""
-    global DEPLOYMENTS
-    for deployment in DEPLOYMENTS:
-        if deployment.id == deployment_id:
-            # Create new deployment object with updated status
-            updated_deployment = DeploymentStatus(
-                id=deployment.id,
-                target_id=deployment.target_id,
-                image=deployment.image,
-                container_name=deployment.container_name,
-                compose_file_path=deployment.compose_file_path,
-                status=status,
-                message=message,
-                created_at=deployment.created_at
-            )
-            # Replace in list
-            index = DEPLOYMENTS.index(deployment)
-            DEPLOYMENTS[index] = updated_deployment
-            break
+    with _deployments_lock:
+        deployment = DEPLOYMENTS.get(deployment_id)
+        if deployment is None:
+            return
+        
+        # Copy with updated status (unchanged fields are not re-validated)
+        DEPLOYMENTS[deployment_id] = deployment.model_copy(
+            update={"status": status, "message": message}
+        )
+    cache.delete("deployments")
 
 
 @router.post("/deployments/apply", response_model=DeploymentStatus, status_code=201)
-async def apply_deployment(request: DeploymentApplyRequest, background_tasks: BackgroundTasks):
+async def apply_deployment(request: DeploymentApplyRequest):
     """Apply a Docker deployment."""
-    global DEPLOYMENT_ID_COUNTER
-    
     target = get_target_by_id(request.target_id)
     if target is None:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    # Create deployment record with "queued" status
+    # next() on itertools.count is atomic under the GIL, so no lock is needed
+    deployment_id = next(_deployment_id_seq)
+    
+    # Create deployment record with "queued" status (fields are already validated,
+    # so model_construct skips a second validation pass)
     if request.compose_file_path:
-        deployment = DeploymentStatus(
-            id=DEPLOYMENT_ID_COUNTER,
+        deployment = DeploymentStatus.model_construct(
+            id=deployment_id,
             target_id=request.target_id,
             compose_file_path=request.compose_file_path,
             status="queued",
             message=f"Deployment queued to {target.address}",
-            created_at=datetime.now()
+            created_at=datetime.now(timezone.utc)
         )
     else:
-        deployment = DeploymentStatus(
-            id=DEPLOYMENT_ID_COUNTER,
+        deployment = DeploymentStatus.model_construct(
+            id=deployment_id,
             target_id=request.target_id,
             image=request.image,
             container_name=request.container_name,
             status="queued",
             message=f"Deployment queued to {target.address}",
-            created_at=datetime.now()
+            created_at=datetime.now(timezone.utc)
         )
     
-    DEPLOYMENT_ID_COUNTER += 1
-    DEPLOYMENTS.append(deployment)
+    with _deployments_lock:
+        DEPLOYMENTS[deployment.id] = deployment
+        if len(DEPLOYMENTS) > settings.deployment_history_max:
+            evicted_id, _ = DEPLOYMENTS.popitem(last=False)
+            discard_deployment_logs(evicted_id)
+    cache.delete("deployments")
     
     # Initialize logs for this deployment
     add_deployment_log(deployment.id, "INFO", f"Deployment {deployment.id} queued for background execution")
@@ -134,41 +175,86 @@ async def apply_deployment(request: DeploymentApplyRequest, background_tasks: Ba
     # Execute deployment in background
     def execute_deployment():
         add_deployment_log(deployment.id, "INFO", f"Starting background deployment {deployment.id} for target {target.name} ({target.address})")
-        logger.info(f"Starting background deployment {deployment.id} for target {target.name} ({target.address})")
+        logger.info("Starting background deployment %s for target %s (%s)", deployment.id, target.name, target.address)
         try:
             update_deployment_status(deployment.id, "running", "Deployment in progress...")
             add_deployment_log(deployment.id, "INFO", "Deployment status: running")
-            add_deployment_log(deployment.id, "INFO", f"Executing deployment commands...")
-            logger.info(f"Deployment {deployment.id}: Executing deployment commands...")
+            add_deployment_log(deployment.id, "INFO", "Executing deployment commands...")
+            logger.info("Deployment %s: Executing deployment commands...", deployment.id)
             
             # Capture logs from deployment service
             result = DeploymentService.deploy(request, target, deployment.id)
             
             add_deployment_log(deployment.id, "INFO", f"Deployment completed successfully: {result}")
-            logger.info(f"Deployment {deployment.id}: Success - {result}")
+            logger.info("Deployment %s: Success - %s", deployment.id, result)
             update_deployment_status(deployment.id, "success", result)
         except Exception as e:
             error_msg = f"Deployment failed: {str(e)}"
             add_deployment_log(deployment.id, "ERROR", error_msg)
-            logger.error(f"Deployment {deployment.id}: Failed - {error_msg}", exc_info=True)
+            logger.error("Deployment %s: Failed - %s", deployment.id, error_msg, exc_info=True)
             update_deployment_status(deployment.id, "failed", error_msg)
+        finally:
+            # The target's container list changed (or may have)
+            invalidate_container_cache(target.id)
+            close_deployment_logs(deployment.id)
     
-    background_tasks.add_task(execute_deployment)
-    logger.info(f"Deployment {deployment.id} queued for background execution")
+    _deploy_executor.submit(execute_deployment)
+    logger.info("Deployment %s queued for background execution", deployment.id)
     
     return deployment
 
 
 @router.get("/deployments", response_model=list[DeploymentStatus])
-async def list_deployments():
+async def list_deployments(request: Request):
     """List all deployments."""
-    return DEPLOYMENTS
+    def render():
+        with _deployments_lock:
+            deployments = list(DEPLOYMENTS.values())
+        return _DEPLOYMENTS_ADAPTER.dump_json(deployments)
+    return etag_response(request, "deployments", render)
 
 
 @router.get("/deployments/{deployment_id}/logs")
 async def get_deployment_logs(deployment_id: int):
     """Get logs for a specific deployment."""
-    if deployment_id not in DEPLOYMENT_LOGS:
-        return []
-    return DEPLOYMENT_LOGS[deployment_id]
+    return read_deployment_logs(deployment_id)
+
+
 
+# Seconds between keepalive comments on an idle log stream
+_LOG_STREAM_KEEPALIVE = 15.0
+
+
+async def _deployment_log_events(deployment_id: int):
+    """Yield server-sent events for a deployment's log until it is closed."""
+    queue, backlog = subscribe_deployment_logs(deployment_id)
+    try:
+        for entry in backlog:
+            yield b"data: " + orjson.dumps(entry) + b"\n\n"
+        
+        while True:
+            try:
+                entry = await asyncio.wait_for(queue.get(), timeout=_LOG_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if entry is None:
+                break
+            yield b"data: " + orjson.dumps(format_log_entry(entry)) + b"\n\n"
+        
+        yield b"event: end\ndata: {}\n\n"
+    finally:
+        unsubscribe_deployment_logs(deployment_id, queue)
+
+
+@router.get("/deployments/{deployment_id}/logs/stream")
+async def stream_deployment_logs(deployment_id: int):
+    """Stream a deployment's logs as server-sent events (backlog first, then new lines)."""
+    if deployment_id not in DEPLOYMENTS:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+    
+    return StreamingResponse(
+        _deployment_log_events(deployment_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
@@ -1,36 +1,46 @@
-from datetime import datetime
-from fastapi import APIRouter, HTTPException
+import itertools
+from datetime import datetime, timezone
+from typing import Literal
+import anyio
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import TypeAdapter
+from deploy_portal_backend.core.cache import cache, cached, etag_response, make_key
+from deploy_portal_backend.core.config import get_settings
 from deploy_portal_backend.models.target import Target, TargetCreate
+from deploy_portal_backend.services.deployment import DeploymentService
 
 router = APIRouter()
 
+settings = get_settings()
+
 # In-memory storage
-TARGETS: list[Target] = []
-TARGET_ID_COUNTER = 1
+TARGETS: dict[int, Target] = {}
+_target_id_seq = itertools.count(1)
+
+# Built once; serializes straight to JSON bytes in pydantic-core
+_TARGETS_ADAPTER = TypeAdapter(list[Target])
 
 
 @router.get("/targets", response_model=list[Target])
-async def list_targets():
+async def list_targets(request: Request):
     """List all targets."""
-    return TARGETS
+    return etag_response(request, "targets", lambda: _TARGETS_ADAPTER.dump_json(list(TARGETS.values())))
 
 
 @router.post("/targets", response_model=Target, status_code=201)
 async def create_target(target: TargetCreate):
     """Create a new target."""
-    global TARGET_ID_COUNTER
-    
-    new_target = Target(
-        id=TARGET_ID_COUNTER,
+    new_target = Target.model_construct(
+        id=next(_target_id_seq),
         name=target.name,
         address=target.address,
         ssh_key_path=target.ssh_key_path,
         ssh_user=target.ssh_user,
-        created_at=datetime.now()
+        created_at=datetime.now(timezone.utc)
     )
     
-    TARGET_ID_COUNTER += 1
-    TARGETS.append(new_target)
+    TARGETS[new_target.id] = new_target
+    cache.delete("targets")
     
     return new_target
 
@@ -38,54 +48,72 @@ async def create_target(target: TargetCreate):
 @router.get("/targets/{target_id}", response_model=Target)
 async def get_target(target_id: int):
     """Get a single target by ID."""
-    for target in TARGETS:
-        if target.id == target_id:
-            return target
+    target = TARGETS.get(target_id)
+    if target is not None:
+        return target
     
     raise HTTPException(status_code=404, detail="Target not found")
 
 
 def get_target_by_id(target_id: int) -> Target | None:
     """Helper function to get target by ID."""
-    for target in TARGETS:
-        if target.id == target_id:
-            return target
-    return None
+    return TARGETS.get(target_id)
+
+
+def invalidate_container_cache(target_id: int, container_name: str | None = None):
+    """Drop cached remote reads for a target's containers."""
+    cache.delete(make_key("containers", target_id))
+    if container_name is not None:
+        cache.delete(make_key("container-logs", target_id, container_name))
+        cache.delete(make_key("container-env", target_id, container_name))
 
 
 @router.get("/targets/{target_id}/containers")
+@cached("containers")
 async def get_target_containers(target_id: int):
     """Get all containers deployed on a target."""
     target = get_target_by_id(target_id)
     if target is None:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    from deploy_portal_backend.services.deployment import DeploymentService
-    containers = DeploymentService.list_containers(target)
+    containers = await anyio.to_thread.run_sync(
+        DeploymentService.list_containers, target
+    )
     return containers
 
 
 @router.get("/targets/{target_id}/containers/{container_name}/logs")
+@cached("container-logs", ttl=settings.container_logs_ttl_seconds)
 async def get_container_logs(target_id: int, container_name: str, lines: int = 100):
     """Get logs for a specific container on a target."""
     target = get_target_by_id(target_id)
     if target is None:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    from deploy_portal_backend.services.deployment import DeploymentService
-    logs = DeploymentService.get_container_logs(target, container_name, lines)
+    logs = await anyio.to_thread.run_sync(
+        DeploymentService.get_container_logs, target, container_name, lines
+    )
+    
+    # Keep only the newest container_logs_max_bytes so a runaway log can't
+    # blow up the response; drop the partial line left at the cut
+    encoded = logs.encode()
+    if len(encoded) > settings.container_logs_max_bytes:
+        tail = encoded[-settings.container_logs_max_bytes:].decode(errors="ignore")
+        logs = tail.split("\n", 1)[-1]
     return {"logs": logs}
 
 
 @router.get("/targets/{target_id}/containers/{container_name}/env")
+@cached("container-env")
 async def get_container_env(target_id: int, container_name: str):
     """Get environment variables for a specific container."""
     target = get_target_by_id(target_id)
     if target is None:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    from deploy_portal_backend.services.deployment import DeploymentService
-    env_vars = DeploymentService.get_container_env(target, container_name)
+    env_vars = await anyio.to_thread.run_sync(
+        DeploymentService.get_container_env, target, container_name
+    )
     return {"env": env_vars}
 
 
@@ -96,20 +124,24 @@ async def update_container_env(target_id: int, container_name: str, env_vars: di
     if target is None:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    from deploy_portal_backend.services.deployment import DeploymentService
-    result = DeploymentService.update_container_env(target, container_name, env_vars.get("env", {}))
+    result = await anyio.to_thread.run_sync(
+        DeploymentService.update_container_env, target, container_name, env_vars.get("env", {})
+    )
+    invalidate_container_cache(target_id, container_name)
     return {"message": result}
 
 
 @router.get("/targets/{target_id}/env")
-async def get_target_env(target_id: int):
-    """Get environment variables for a VM target."""
+@cached("target-env")
+async def get_target_env(target_id: int, source: Literal["file", "merged"] = "merged"):
+    """Get environment variables for a VM target (source=file skips the shell env)."""
     target = get_target_by_id(target_id)
     if target is None:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    from deploy_portal_backend.services.deployment import DeploymentService
-    env_vars = DeploymentService.get_target_env(target)
+    env_vars = await anyio.to_thread.run_sync(
+        DeploymentService.get_target_env, target, source
+    )
     return {"env": env_vars}
 
 
@@ -120,8 +152,9 @@ async def update_target_env(target_id: int, env_vars: dict):
     if target is None:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    from deploy_portal_backend.services.deployment import DeploymentService
-    result = DeploymentService.update_target_env(target, env_vars.get("env", {}))
+    result = await anyio.to_thread.run_sync(
+        DeploymentService.update_target_env, target, env_vars.get("env", {})
+    )
     return {"message": result}
 
 
@@ -132,8 +165,10 @@ async def stop_container(target_id: int, container_name: str):
     if target is None:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    from deploy_portal_backend.services.deployment import DeploymentService
-    result = DeploymentService.stop_container(target, container_name)
+    result = await anyio.to_thread.run_sync(
+        DeploymentService.stop_container, target, container_name
+    )
+    invalidate_container_cache(target_id, container_name)
     return {"message": result}
 
 
@@ -144,7 +179,9 @@ async def delete_container(target_id: int, container_name: str):
     if target is None:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    from deploy_portal_backend.services.deployment import DeploymentService
-    result = DeploymentService.delete_container(target, container_name)
+    result = await anyio.to_thread.run_sync(
+        DeploymentService.delete_container, target, container_name
+    )
+    invalidate_container_cache(target_id, container_name)
     return {"message": result}
 
@@ -0,0 +1,94 @@
+import hashlib
+import inspect
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable
+from fastapi import Request, Response
+from deploy_portal_backend.core.config import get_settings
+
+_MISS = object()
+
+_DEFAULT_TTL = get_settings().cache_ttl_seconds
+
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry expiry, keyed by ``:``-joined parts."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: dict[str, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                # Drop the oldest insertion to stay bounded
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, prefix: str):
+        """Remove the entry ``prefix`` and every entry nested under it."""
+        nested = prefix + ":"
+        with self._lock:
+            for key in [k for k in self._data if k == prefix or k.startswith(nested)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+cache = TTLCache()
+
+
+def make_key(*parts: Any) -> str:
+    """Build a cache key from its parts."""
+    return ":".join(str(part) for part in parts)
+
+
+def cached(prefix: str, ttl: float = _DEFAULT_TTL):
+    """Cache the result of an async route handler, keyed on prefix + arguments."""
+    def decorator(func: Callable):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            key = make_key(prefix, *(
+                value for value in bound.arguments.values()
+                if not isinstance(value, Request)
+            ))
+            value = cache.get(key, _MISS)
+            if value is _MISS:
+                value = await func(*args, **kwargs)
+                cache.set(key, value, ttl)
+            return value
+
+        return wrapper
+    return decorator
+
+
+def etag_response(request: Request, key: str, render: Callable[[], bytes], ttl: float = _DEFAULT_TTL) -> Response:
+    """Return a cached JSON response with an ETag, or 304 if the client copy is current."""
+    entry = cache.get(key)
+    if entry is None:
+        body = render()
+        entry = (body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"')
+        cache.set(key, entry, ttl)
+
+    body, etag = entry
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
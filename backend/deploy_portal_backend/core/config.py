@@ -1,8 +1,38 @@
-import os
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Literal
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-load_dotenv()
 
-API_PREFIX: str = os.getenv("API_PREFIX", "/api")
-PROJECT_NAME: str = os.getenv("PROJECT_NAME", "Manifold")
+class Settings(BaseSettings):
+    """Application settings, read from the environment (and .env) once."""
 
+    model_config = SettingsConfigDict(env_file=".env", frozen=True)
+
+    api_prefix: str = "/api"
+    project_name: str = "Manifold"
+    log_format: Literal["json", "text"] = "json"
+    cors_allowed_origins: frozenset[str] = frozenset({
+        "http://localhost:5173",
+        "http://localhost:3000",
+    })
+
+    threadpool_limit: int = 64
+    deploy_max_workers: int = 8
+    deployment_history_max: int = 10000
+    deployment_log_lines_max: int = 5000
+    cache_ttl_seconds: float = 2
+    container_logs_ttl_seconds: float = 1
+    container_logs_max_bytes: int = 1024 * 1024
+    host_caps_ttl_seconds: float = 300
+    docker_recheck_seconds: float = 86400
+    ssh_pool_max_idle_per_host: int = 4
+    ssh_pool_idle_timeout_seconds: float = 300
+    ssh_keepalive_seconds: int = 15
+    # Command output is small, so compression usually costs more CPU than it saves
+    ssh_compress: bool = False
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings instance."""
+    return Settings()
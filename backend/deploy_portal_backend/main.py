@@ -1,34 +1,53 @@
 import logging
+from contextlib import asynccontextmanager
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from deploy_portal_backend.core.config import API_PREFIX, PROJECT_NAME
+from fastapi.responses import ORJSONResponse
+from deploy_portal_backend.core.config import get_settings
+from deploy_portal_backend.core.json_logging import JsonFormatter
 from deploy_portal_backend.api.routes_targets import router as targets_router
 from deploy_portal_backend.api.routes_deployments import router as deployments_router
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+settings = get_settings()
+
+# Configure logging (JSON lines by default so collectors don't have to parse text)
+if settings.log_format == "json":
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(JsonFormatter(datefmt='%Y-%m-%dT%H:%M:%S%z'))
+    logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
+else:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync handlers and the SSH calls offloaded from async routes share this
+    # limiter; raise its default of 40 so slow SSH sessions don't starve it
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_limit
+    yield
+
 
-app = FastAPI(title=PROJECT_NAME)
+app = FastAPI(title=settings.project_name, default_response_class=ORJSONResponse, lifespan=lifespan)
 
-# CORS middleware
+# CORS middleware. max_age lets browsers cache preflight responses for a day
+# instead of sending an OPTIONS request ahead of every poll.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:5173",
-        "http://localhost:3000",
-    ],
+    allow_origins=settings.cors_allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,
 )
 
 # Include routers
-app.include_router(targets_router, prefix=API_PREFIX)
-app.include_router(deployments_router, prefix=API_PREFIX)
+app.include_router(targets_router, prefix=settings.api_prefix)
+app.include_router(deployments_router, prefix=settings.api_prefix)
 
 
 @app.get("/")
@@ -1,9 +1,10 @@
 from datetime import datetime
 from typing import Literal, Optional
-from pydantic import BaseModel, model_validator
+from pydantic.main import BaseModel
+from pydantic.functional_validators import model_validator
 
 
-class DeploymentPreviewRequest(BaseModel):
+class DeploymentRequest(BaseModel):
     target_id: int
     # Single container deployment fields
     image: Optional[str] = None  # Docker image name (e.g., "nginx:latest")
@@ -12,39 +13,28 @@ class DeploymentPreviewRequest(BaseModel):
     # Docker Compose deployment field
     compose_file_path: Optional[str] = None  # Path to docker-compose.yml file
     
-    @model_validator(mode='after')
-    def validate_deployment_type(self):
-        """Ensure either single container OR compose file is provided."""
-        has_single_container = self.image is not None and self.container_name is not None
-        has_compose_file = self.compose_file_path is not None
+    @model_validator(mode='before')
+    @classmethod
+    def validate_deployment_type(cls, data):
+        """Ensure either single container OR compose file is provided.
         
-        if not (has_single_container or has_compose_file):
-            raise ValueError("Either provide (image, container_name) OR compose_file_path")
-        if has_single_container and has_compose_file:
-            raise ValueError("Cannot provide both single container and compose file")
-        return self
-
-
-class DeploymentApplyRequest(BaseModel):
-    target_id: int
-    # Single container deployment fields
-    image: Optional[str] = None  # Docker image name
-    container_name: Optional[str] = None  # Name for the container
-    ports: Optional[str] = None  # Port mapping (e.g., "8080:80")
-    # Docker Compose deployment field
-    compose_file_path: Optional[str] = None  # Path to docker-compose.yml file
-    
-    @model_validator(mode='after')
-    def validate_deployment_type(self):
-        """Ensure either single container OR compose file is provided."""
-        has_single_container = self.image is not None and self.container_name is not None
-        has_compose_file = self.compose_file_path is not None
-        
-        if not (has_single_container or has_compose_file):
-            raise ValueError("Either provide (image, container_name) OR compose_file_path")
-        if has_single_container and has_compose_file:
-            raise ValueError("Cannot provide both single container and compose file")
-        return self
+        Checked on the raw input so an invalid body fails before field validation runs.
+        """
+        if isinstance(data, dict):
+            has_single_container = data.get("image") is not None and data.get("container_name") is not None
+            has_compose_file = data.get("compose_file_path") is not None
+            
+            if has_single_container + has_compose_file != 1:
+                if has_compose_file:
+                    raise ValueError("Cannot provide both single container and compose file")
+                raise ValueError("Either provide (image, container_name) OR compose_file_path")
+        return data
+
+
+# Preview and apply take the same body; aliasing one model means pydantic builds
+# (and runs) a single schema and validator for both
+DeploymentPreviewRequest = DeploymentRequest
+DeploymentApplyRequest = DeploymentRequest
 
 
 class DeploymentStatus(BaseModel):
@@ -1,5 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel
+from typing import Optional
+from pydantic.main import BaseModel
 
 
 class TargetBase(BaseModel):
@@ -16,4 +17,6 @@ class TargetCreate(TargetBase):
 class Target(TargetBase):
     id: int
     created_at: datetime
+    docker_version: Optional[str] = None  # Set once Docker is known to work on the target
+    docker_checked_at: Optional[datetime] = None  # When docker_version was last confirmed
 
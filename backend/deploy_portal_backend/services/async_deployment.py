@@ -0,0 +1,60 @@
+import asyncio
+from typing import Iterable, Optional, Union
+import anyio
+import anyio.to_thread
+from deploy_portal_backend.core.config import get_settings
+from deploy_portal_backend.models.target import Target
+from deploy_portal_backend.models.deployment import DeploymentApplyRequest
+from deploy_portal_backend.services.deployment import DeploymentService
+
+
+async def deploy_many(
+    jobs: Iterable[tuple[DeploymentApplyRequest, Target, Optional[int]]],
+) -> list[Union[str, BaseException]]:
+    """Run (request, target, deployment_id) deployments concurrently.
+
+    Jobs for the same target share one SSH connection (see
+    DeploymentService.deploy_to_target); targets are handled in parallel on
+    worker threads, at most deploy_max_workers at a time. Results come back in
+    job order; a failed deployment yields its exception instead of cancelling
+    the others.
+    """
+    targets: dict[int, Target] = {}
+    positions: dict[int, list[int]] = {}
+    batches: dict[int, list[tuple[DeploymentApplyRequest, Optional[int]]]] = {}
+    for position, (request, target, deployment_id) in enumerate(jobs):
+        targets[target.id] = target
+        positions.setdefault(target.id, []).append(position)
+        batches.setdefault(target.id, []).append((request, deployment_id))
+
+    limiter = anyio.CapacityLimiter(get_settings().deploy_max_workers)
+    batch_results = await asyncio.gather(
+        *(
+            anyio.to_thread.run_sync(DeploymentService.deploy_to_target, targets[target_id], batch, limiter=limiter)
+            for target_id, batch in batches.items()
+        ),
+        return_exceptions=True,
+    )
+
+    results: list[Union[str, BaseException]] = [None] * sum(map(len, positions.values()))
+    for target_id, outcome in zip(batches, batch_results):
+        for index, position in enumerate(positions[target_id]):
+            # A failure before any deployment ran (e.g. connecting) applies to the whole batch
+            results[position] = outcome if isinstance(outcome, BaseException) else outcome[index]
+    return results
+
+
+async def bulk_update_target_env(targets: Iterable[Target], env_vars: dict) -> list[Union[str, BaseException]]:
+    """Write the same /etc/environment to many targets concurrently.
+
+    Each target's update runs on a worker thread, at most deploy_max_workers at a
+    time. Results come back in target order; a failed update yields its exception.
+    """
+    limiter = anyio.CapacityLimiter(get_settings().deploy_max_workers)
+    return await asyncio.gather(
+        *(
+            anyio.to_thread.run_sync(DeploymentService.update_target_env, target, env_vars, limiter=limiter)
+            for target in targets
+        ),
+        return_exceptions=True,
+    )
@@ -1,67 +1,382 @@
 import os
+import re
+import functools
+import hashlib
+import itertools
+import json
 import logging
+import select
+import shlex
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Annotated, Iterator, Literal, Optional
 import paramiko
-from typing import Optional
+from pydantic import StringConstraints, TypeAdapter
+from deploy_portal_backend.core.cache import cache, make_key
+from deploy_portal_backend.core.config import get_settings
 from deploy_portal_backend.models.target import Target
 from deploy_portal_backend.models.deployment import DeploymentApplyRequest
+from deploy_portal_backend.services.deployment_logs import add_deployment_log, add_deployment_logs
 
 logger = logging.getLogger(__name__)
 
-# Import log storage function
-try:
-    from deploy_portal_backend.api.routes_deployments import add_deployment_log
-except ImportError:
-    # Fallback if circular import
-    def add_deployment_log(deployment_id: int, level: str, message: str):
-        pass
+# Independent host probes, batched into one script; prints KEY=value lines
+_HOST_PROBE_SCRIPT = (
+    'echo "UID=$(id -u)"; '
+    'command -v sudo >/dev/null 2>&1 && echo "SUDO=1" || echo "SUDO=0"; '
+    'sudo -n true >/dev/null 2>&1 && echo "NOPASSWD=1" || echo "NOPASSWD=0"; '
+    'docker ps >/dev/null 2>&1 && echo "DOCKER_NOSUDO=1" || echo "DOCKER_NOSUDO=0"; '
+    'echo "DOCKER_VERSION=$(docker --version 2>/dev/null)"; '
+    'echo "OS_ID=$(. /etc/os-release 2>/dev/null && echo "$ID")"; '
+    'command -v dnf >/dev/null 2>&1 && echo "PKG_MGR=dnf" || echo "PKG_MGR=yum"'
+)
+
+# docker run -p forms: [ip:[hostPort]:]containerPort or hostPort:containerPort,
+# where ports may be ranges, plus an optional /protocol
+_PORT = r"\d{1,5}(?:-\d{1,5})?"
+_PORT_IP = r"\d{1,3}(?:\.\d{1,3}){3}|\[[0-9A-Fa-f:]+\]"
+PortMapping = Annotated[
+    str,
+    StringConstraints(
+        strip_whitespace=True,
+        pattern=rf"^(?:(?:{_PORT_IP}):(?:{_PORT})?:|{_PORT}:)?{_PORT}(?:/(?:tcp|udp|sctp))?$",
+    ),
+]
+_PORTS_ADAPTER = TypeAdapter(list[PortMapping])
+
+# Legacy SHA-1 key exchanges and host key types, and CBC/3DES ciphers; dropping
+# them lets negotiation settle on curve25519 / ed25519 (or rsa-sha2) and AES-GCM
+# or AES-CTR without slower fallbacks
+_DISABLED_SSH_ALGORITHMS = {
+    "kex": ["diffie-hellman-group-exchange-sha1", "diffie-hellman-group14-sha1", "diffie-hellman-group1-sha1"],
+    "keys": ["ssh-rsa", "ssh-dss"],
+    "ciphers": ["aes128-cbc", "aes192-cbc", "aes256-cbc", "3des-cbc"],
+}
+
+
+class _GCMFirstTransport(paramiko.Transport):
+    """Transport that offers AES-GCM ahead of AES-CTR.
+    
+    GCM encrypts and authenticates in one AES-NI accelerated pass, where CTR
+    needs a separate HMAC over every packet; servers without GCM still get CTR.
+    """
+    
+    _preferred_ciphers = tuple(sorted(paramiko.Transport._preferred_ciphers, key=lambda cipher: "-gcm@" not in cipher))
+
+
+# /etc/os-release IDs handled by the Debian and CentOS installers
+_DEBIAN_FAMILY = frozenset({"ubuntu", "debian"})
+_RHEL_FAMILY = frozenset({"centos", "rhel", "fedora", "rocky", "almalinux"})
+
+# Output of a failed install step meaning there was nothing to do; one
+# case-insensitive pass instead of lowercasing and scanning once per phrase
+_ALREADY_DONE_RE = re.compile(r"already exists|is already the newest version|already installed", re.IGNORECASE)
+
+# KEY=value lines of /etc/environment (skipping blanks and # comments) and of
+# `env` output; whitespace around keys and values is left out of the groups,
+# and lines with an empty key are skipped
+_ETC_ENV_RE = re.compile(r"^\s*([^#=\s][^=\n]*?)[^\S\n]*=[^\S\n]*(.*?)[^\S\n]*$", re.MULTILINE)
+_SHELL_ENV_RE = re.compile(r"^[^\S\n]*([^=\s][^=\n]*?)[^\S\n]*=[^\S\n]*(.*?)[^\S\n]*$", re.MULTILINE)
+
+# Escapes for values written to /etc/environment as KEY="value"
+_ENV_ESCAPES = str.maketrans({'"': '\\"', '$': '\\$'})
+
+# Channel reads: bytes per recv() and how often to check for stderr data
+_RECV_CHUNK = 65536
+_RECV_POLL_SECONDS = 0.05
+
+# Parallel deployments sharing one connection in deploy_to_target; sshd's
+# MaxSessions defaults to 10 channels per connection
+_MAX_CHANNELS_PER_TARGET = 8
+
+# Container label holding the spec hash a container was deployed from
+_SPEC_HASH_LABEL = "manifold.spec-hash"
+
+# Errors meaning the cached sudo/docker probe results no longer hold
+# (e.g. the user was removed from the docker group, or docker was uninstalled)
+_STALE_CAPS_MARKERS = ("permission denied", "command not found")
+
+# SSHClient attribute holding its persistent _RemoteShell (False if the shell
+# doesn't start on that host)
+_REMOTE_SHELL_ATTR = "_manifold_remote_shell"
+_remote_shells_lock = threading.Lock()
+
+# Exit status of the compose deploy command when the compose file is missing (EX_NOINPUT)
+_COMPOSE_FILE_MISSING_EXIT = 66
+
+# Printed on its own line after each step of a batched script, followed by
+# "<step index>:<exit status>"; the newline before it is part of the marker, so
+# output without a trailing newline can't swallow it
+_STEP_MARKER = "===STEP:"
+_STEP_MARKER_RE = re.compile(r"\n" + re.escape(_STEP_MARKER) + r"(\d+):(\d+)\n")
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class HostCaps:
+    """Privileges of the SSH user on a target host."""
+    
+    uid: int
+    has_sudo: bool
+    passwordless_sudo: bool
+    docker_without_sudo: bool
+    docker_version: str  # empty if docker isn't installed or doesn't work
+    os_id: str  # ID from /etc/os-release
+    pkg_manager: str  # dnf or yum; only meaningful on RHEL-family hosts
+    
+    @property
+    def sudo_prefix(self) -> str:
+        """Prefix for commands that need root."""
+        if self.has_sudo:
+            return "sudo "
+        if self.uid == 0:
+            return ""
+        raise Exception("Cannot install Docker: user is not root and sudo is not available")
+    
+    @property
+    def docker_sudo(self) -> str:
+        """Prefix for docker commands (sudo unless the user is in the docker group)."""
+        return "" if self.docker_without_sudo else self.sudo_prefix
+
+
+class _SSHPool:
+    """Idle SSH connections kept per (address, user, key path) for reuse.
+    
+    At most ssh_pool_max_idle_per_host connections are kept per host (extra ones
+    are closed on release, keeping us well under sshd's MaxStartups), and
+    connections idle for longer than ssh_pool_idle_timeout_seconds are dropped.
+    """
+    
+    def __init__(self):
+        # key -> (time released, client), most recently released last
+        self._idle: defaultdict[tuple[str, str, str], deque[tuple[float, paramiko.SSHClient]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(target: Target) -> tuple[str, str, str]:
+        return (target.address, target.ssh_user, target.ssh_key_path)
+    
+    @staticmethod
+    def _is_alive(ssh: paramiko.SSHClient) -> bool:
+        """Check that a pooled connection's transport still works."""
+        transport = ssh.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except (EOFError, OSError, paramiko.SSHException):
+            return False
+        return True
+    
+    def acquire(self, target: Target) -> Optional[paramiko.SSHClient]:
+        """Take a live idle connection for target, or None if there is none."""
+        key = self._key(target)
+        expired: list[paramiko.SSHClient] = []
+        ssh = None
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                # Oldest first, so everything past the idle timeout is at the front
+                cutoff = time.monotonic() - settings.ssh_pool_idle_timeout_seconds
+                while idle and idle[0][0] < cutoff:
+                    expired.append(idle.popleft()[1])
+                if idle:
+                    ssh = idle.pop()[1]
+        
+        for stale in expired:
+            stale.close()
+        while ssh is not None:
+            if self._is_alive(ssh):
+                return ssh
+            ssh.close()
+            with self._lock:
+                idle = self._idle.get(key)
+                ssh = idle.pop()[1] if idle else None
+        return None
+    
+    def release(self, target: Target, ssh: paramiko.SSHClient):
+        """Return a connection to the pool, closing it if the host already has enough idle."""
+        with self._lock:
+            idle = self._idle[self._key(target)]
+            if len(idle) < settings.ssh_pool_max_idle_per_host:
+                idle.append((time.monotonic(), ssh))
+                return
+        ssh.close()
+
+
+_ssh_pool = _SSHPool()
+
+
+class _RemoteShellUnavailable(paramiko.SSHException):
+    """The persistent shell exited before finishing its first command (e.g. no sh on the host)."""
+
+
+class _RemoteShell:
+    """A long-lived ``sh -s`` channel on a connection that runs commands one at a time.
+    
+    Saves the channel open (and sshd exec) per command. Each command runs in a
+    subshell with stdin from /dev/null, so cd/exports and stdin reads can't leak
+    into the shell; a random sentinel written to stdout (with the exit status)
+    and to stderr marks where its output ends. The wrapper is plain POSIX sh, so
+    hosts without bash (Alpine, busybox) work too.
+    """
+    
+    def __init__(self, ssh: paramiko.SSHClient):
+        self.lock = threading.Lock()
+        # Set once a command has completed, i.e. the shell is known to work
+        self._ready = False
+        self._channel = ssh.get_transport().open_session()
+        self._channel.exec_command("sh -s")
+    
+    @property
+    def usable(self) -> bool:
+        channel = self._channel
+        return not (channel.closed or channel.eof_received or channel.exit_status_ready())
+    
+    def close(self):
+        self._channel.close()
+    
+    def run(self, command: str) -> tuple[int, bytes, bytes]:
+        """Run one command; return its exit status, stdout and stderr. Call with lock held."""
+        sentinel = f"__manifold_{uuid.uuid4().hex}__".encode()
+        stdout_end = re.compile(rb"\n" + sentinel + rb":(\d+)\n")
+        stderr_end = b"\n" + sentinel + b"\n"
+        channel = self._channel
+        try:
+            channel.sendall(
+                b"(" + command.encode() + b"\n) </dev/null\n"
+                # stderr's marker goes first: by the time stdout's (which wakes
+                # select) arrives, stderr is normally complete too
+                b"__manifold_rc=$?\n"
+                b"printf '\\n%s\\n' " + sentinel + b" >&2\n"
+                b"printf '\\n%s:%d\\n' " + sentinel + b" \"$__manifold_rc\"\n"
+            )
+        except OSError as e:
+            # A shell that failed to start may already have closed the channel
+            if not self._ready:
+                raise _RemoteShellUnavailable(f"Remote shell exited before running a command: {e}") from e
+            raise
+        
+        stdout_buf, stderr_buf = bytearray(), bytearray()
+        stdout_match, stderr_end_at = None, -1
+        while stdout_match is None or stderr_end_at < 0:
+            while channel.recv_ready():
+                stdout_buf += channel.recv(_RECV_CHUNK)
+            while channel.recv_stderr_ready():
+                stderr_buf += channel.recv_stderr(_RECV_CHUNK)
+            stdout_match = stdout_match or stdout_end.search(stdout_buf)
+            if stderr_end_at < 0:
+                stderr_end_at = stderr_buf.find(stderr_end)
+            if stdout_match is not None and stderr_end_at >= 0:
+                break
+            if channel.closed or channel.eof_received:
+                if not self._ready:
+                    raise _RemoteShellUnavailable("Remote shell exited before running a command")
+                raise paramiko.SSHException("Remote shell exited unexpectedly")
+            select.select([channel], [], [], _RECV_POLL_SECONDS)
+        
+        self._ready = True
+        return int(stdout_match.group(1)), bytes(stdout_buf[:stdout_match.start()]), bytes(stderr_buf[:stderr_end_at])
 
 
 class DeploymentService:
     """Service for deploying Docker containers via SSH."""
     
     @staticmethod
-    def _get_sudo_prefix(ssh: paramiko.SSHClient, deployment_id: Optional[int] = None) -> str:
-        """Check if sudo is available and return appropriate prefix."""
-        check_sudo_cmd = "command -v sudo >/dev/null 2>&1 && echo 'sudo' || echo 'no_sudo'"
+    def _get_host_caps(ssh: paramiko.SSHClient, target: Target, deployment_id: Optional[int] = None) -> HostCaps:
+        """Probe whether the remote user is root, has sudo and can run docker, and which OS/docker it has.
+        
+        Results are cached per target for host_caps_ttl_seconds, so repeat deploys
+        to the same host skip the probe entirely.
+        """
+        key = make_key("host-caps", target.id)
+        caps = cache.get(key)
+        if caps is not None:
+            return caps
+        
+        # All probes in one exec_command so they cost a single channel round-trip
         exit_status, stdout_text, _ = DeploymentService._execute_command(
-            ssh, check_sudo_cmd, "Check sudo availability", deployment_id
+            ssh, _HOST_PROBE_SCRIPT, "Probe host OS, sudo and docker access", deployment_id
+        )
+        values = dict(line.split("=", 1) for line in stdout_text.splitlines() if "=" in line)
+        caps = HostCaps(
+            uid=int(values.get("UID") or -1),
+            has_sudo=values.get("SUDO") == "1",
+            passwordless_sudo=values.get("NOPASSWD") == "1",
+            docker_without_sudo=values.get("DOCKER_NOSUDO") == "1",
+            docker_version=values.get("DOCKER_VERSION", ""),
+            os_id=values.get("OS_ID", "").lower() or "unknown",
+            pkg_manager=values.get("PKG_MGR") or "yum",
         )
+        if caps.has_sudo and not caps.passwordless_sudo:
+            logger.warning("Sudo requires password - assuming passwordless sudo is configured")
         
-        if "sudo" in stdout_text.lower():
-            # Check if passwordless sudo is available
-            check_passwordless = "sudo -n true 2>&1 && echo 'passwordless' || echo 'needs_password'"
-            exit_status, sudo_check, _ = DeploymentService._execute_command(
-                ssh, check_passwordless, "Check passwordless sudo"
-            )
-            if "passwordless" in sudo_check.lower():
-                logger.debug("Passwordless sudo available")
-                return "sudo "
-            else:
-                logger.warning("Sudo requires password - assuming passwordless sudo is configured")
-                return "sudo "
-        else:
-            # Check if we're already root
-            check_root_cmd = "[ $(id -u) -eq 0 ] && echo 'root' || echo 'not_root'"
-            exit_status, root_check, _ = DeploymentService._execute_command(
-                ssh, check_root_cmd, "Check if root user"
-            )
-            if "root" in root_check.lower():
-                logger.debug("Running as root, no sudo needed")
-                return ""
-            else:
-                raise Exception("Cannot install Docker: user is not root and sudo is not available")
+        # One line per former probe command, so deployment logs still show each result
+        if deployment_id:
+            sudo_state = ("passwordless" if caps.passwordless_sudo else "requires password") if caps.has_sudo else "not available"
+            add_deployment_logs(deployment_id, [
+                ("INFO", f"✓ Check sudo availability - {sudo_state}"),
+                ("INFO", f"✓ Check if root user - {'yes' if caps.uid == 0 else 'no'}"),
+                ("INFO", f"✓ Check Docker installation - {caps.docker_version or 'not installed'}"),
+                ("INFO", f"✓ Check if docker needs sudo - {'no' if caps.docker_without_sudo else 'yes'}"),
+                ("INFO", f"✓ Detect OS - {caps.os_id}"),
+            ])
+        
+        cache.set(key, caps, settings.host_caps_ttl_seconds)
+        return caps
+    
+    @staticmethod
+    def _forget_host_caps(target: Target):
+        """Drop cached probe results, e.g. after installing docker changed them."""
+        cache.delete(make_key("host-caps", target.id))
+    
+    @staticmethod
+    def _forget_host_caps_on_error(target: Target, error: BaseException):
+        """Drop cached probe results if a failure suggests they're out of date."""
+        message = str(error).lower()
+        if any(marker in message for marker in _STALE_CAPS_MARKERS):
+            DeploymentService._forget_host_caps(target)
+            DeploymentService._mark_docker_provisioned(target, None)
+    
+    @staticmethod
+    def _get_sudo_prefix(ssh: paramiko.SSHClient, target: Target, deployment_id: Optional[int] = None) -> str:
+        """Return the prefix for commands that need root (from the cached host probe)."""
+        return DeploymentService._get_host_caps(ssh, target, deployment_id).sudo_prefix
+    
+    @staticmethod
+    def _mark_docker_provisioned(target: Target, docker_version: Optional[str]):
+        """Record (or with None, clear) that Docker works on target."""
+        target.docker_version = docker_version
+        target.docker_checked_at = datetime.now(timezone.utc) if docker_version else None
+        cache.delete("targets")
     
     @staticmethod
     def _check_and_install_docker(ssh: paramiko.SSHClient, target: Target, deployment_id: Optional[int] = None):
         """Check if Docker is installed, install if not."""
+        # Docker seen working recently: skip the check (a failure that looks
+        # like it's gone clears this, see _forget_host_caps_on_error)
+        if target.docker_checked_at is not None and (
+            datetime.now(timezone.utc) - target.docker_checked_at
+        ).total_seconds() < settings.docker_recheck_seconds:
+            logger.info(f"Docker already provisioned on {target.address}: {target.docker_version}")
+            return
+        
         log_msg = "Checking if Docker is installed on remote VM..."
         logger.info(log_msg)
         if deployment_id:
             add_deployment_log(deployment_id, "INFO", log_msg)
         
-        # Get sudo prefix
         try:
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh, deployment_id)
+            caps = DeploymentService._get_host_caps(ssh, target, deployment_id)
+            sudo_prefix = caps.sudo_prefix
         except Exception as e:
             error_msg = f"Cannot proceed with Docker installation: {str(e)}"
             logger.error(error_msg)
@@ -69,39 +384,21 @@ class DeploymentService:
                 add_deployment_log(deployment_id, "ERROR", error_msg)
             raise
         
-        # Check if docker command exists
-        check_cmd = "command -v docker >/dev/null 2>&1 && echo 'installed' || echo 'not_installed'"
-        exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
-            ssh, check_cmd, "Check Docker installation", deployment_id
-        )
-        
-        if "installed" in stdout_text.lower():
-            # Verify Docker is working
-            version_cmd = "docker --version"
-            exit_status, version_output, _ = DeploymentService._execute_command(
-                ssh, version_cmd, "Check Docker version"
-            )
-            if exit_status == 0:
-                logger.info(f"Docker is already installed: {version_output}")
-                return
-            else:
-                logger.warning("Docker command exists but doesn't work, attempting reinstall...")
+        if caps.docker_version:
+            logger.info(f"Docker is already installed: {caps.docker_version}")
+            DeploymentService._mark_docker_provisioned(target, caps.docker_version)
+            return
         
         logger.info("Docker not found, installing Docker...")
         
-        # Detect OS and install Docker accordingly
-        detect_os_cmd = "cat /etc/os-release | grep '^ID=' | cut -d'=' -f2 | tr -d '\"'"
-        exit_status, os_id, _ = DeploymentService._execute_command(
-            ssh, detect_os_cmd, "Detect OS"
-        )
-        
-        os_id = os_id.lower().strip() if os_id else "unknown"
+        # Install Docker according to the OS detected by the host probe
+        os_id = caps.os_id
         logger.info(f"Detected OS: {os_id}")
         
-        if os_id in ["ubuntu", "debian"]:
+        if os_id in _DEBIAN_FAMILY:
             DeploymentService._install_docker_debian(ssh, sudo_prefix)
-        elif os_id in ["centos", "rhel", "fedora", "rocky", "almalinux"]:
-            DeploymentService._install_docker_centos(ssh, sudo_prefix)
+        elif os_id in _RHEL_FAMILY:
+            DeploymentService._install_docker_centos(ssh, sudo_prefix, caps.pkg_manager)
         else:
             logger.warning(f"Unknown OS '{os_id}', attempting generic Docker installation...")
             DeploymentService._install_docker_generic(ssh, sudo_prefix)
@@ -115,7 +412,16 @@ class DeploymentService:
         if exit_status != 0:
             raise Exception("Docker installation failed - docker command not available after installation")
         
+        # The earlier docker probe ran before docker existed
+        DeploymentService._forget_host_caps(target)
+        
         logger.info(f"Docker installed successfully: {version_output}")
+        DeploymentService._mark_docker_provisioned(target, version_output)
+    
+    @staticmethod
+    def _is_already_done(output: str) -> bool:
+        """Whether a failed install step's output says the work was already done."""
+        return _ALREADY_DONE_RE.search(output) is not None
     
     @staticmethod
     def _install_docker_debian(ssh: paramiko.SSHClient, sudo_prefix: str, deployment_id: Optional[int] = None):
@@ -138,27 +444,18 @@ class DeploymentService:
             (f"{sudo_prefix}systemctl enable docker", "Enable Docker service"),
         ]
         
-        for cmd, description in commands:
-            exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
-                ssh, cmd, description, deployment_id
-            )
+        results = DeploymentService._execute_script(ssh, commands, deployment_id)
+        for (_, description), (exit_status, output) in zip(commands, results):
             if exit_status != 0:
                 # Some commands may fail but are non-critical (like adding repo if already exists)
-                if "already exists" not in stderr_text.lower() and "is already the newest version" not in stderr_text.lower() and "already installed" not in stderr_text.lower():
+                if not DeploymentService._is_already_done(output):
                     logger.warning(f"{description} returned exit code {exit_status}, but continuing...")
-                    logger.debug(f"Error: {stderr_text}")
+                    logger.debug("Error: %s", output)
     
     @staticmethod
-    def _install_docker_centos(ssh: paramiko.SSHClient, sudo_prefix: str):
-        """Install Docker on CentOS/RHEL/Fedora systems."""
+    def _install_docker_centos(ssh: paramiko.SSHClient, sudo_prefix: str, pm: str = "yum"):
+        """Install Docker on CentOS/RHEL/Fedora systems using pm (dnf or yum, from the host probe)."""
         logger.info("Installing Docker on CentOS/RHEL system...")
-        
-        # Try dnf first (Fedora/newer), fall back to yum
-        check_dnf_cmd = "command -v dnf >/dev/null 2>&1 && echo 'dnf' || echo 'yum'"
-        exit_status, package_manager, _ = DeploymentService._execute_command(
-            ssh, check_dnf_cmd, "Detect package manager"
-        )
-        pm = "dnf" if "dnf" in package_manager.lower() else "yum"
         logger.info(f"Using package manager: {pm}")
         
         commands = [
@@ -169,14 +466,12 @@ class DeploymentService:
             (f"{sudo_prefix}systemctl enable docker", "Enable Docker service"),
         ]
         
-        for cmd, description in commands:
-            exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
-                ssh, cmd, description
-            )
+        results = DeploymentService._execute_script(ssh, commands)
+        for (_, description), (exit_status, output) in zip(commands, results):
             if exit_status != 0:
-                if "already installed" not in stderr_text.lower() and "already exists" not in stderr_text.lower():
+                if not DeploymentService._is_already_done(output):
                     logger.warning(f"{description} returned exit code {exit_status}, but continuing...")
-                    logger.debug(f"Error: {stderr_text}")
+                    logger.debug("Error: %s", output)
     
     @staticmethod
     def _install_docker_generic(ssh: paramiko.SSHClient, sudo_prefix: str, deployment_id: Optional[int] = None):
@@ -194,15 +489,47 @@ class DeploymentService:
             (f"{sudo_prefix}systemctl enable docker || {sudo_prefix}chkconfig docker on", "Enable Docker service"),
         ]
         
-        for cmd, description in commands:
-            exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
-                ssh, cmd, description, deployment_id
-            )
+        results = DeploymentService._execute_script(ssh, commands, deployment_id)
+        for (_, description), (exit_status, output) in zip(commands, results):
             if exit_status != 0:
                 # Some commands may fail (like systemctl vs service)
-                if "already installed" not in stderr_text.lower():
+                if not DeploymentService._is_already_done(output):
                     logger.warning(f"{description} returned exit code {exit_status}, but continuing...")
-                    logger.debug(f"Error: {stderr_text}")
+                    logger.debug("Error: %s", output)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _load_private_key(ssh_key_path: str, mtime: float) -> paramiko.PKey:
+        """Load a private key, picking the key class from the file header instead of trial and error.
+        
+        Cached per (path, mtime): parsing is the slowest part of connecting, and
+        a replaced key file gets a new mtime.
+        """
+        with open(ssh_key_path, "rb") as f:
+            header = f.readline()
+        
+        # Failed RSA parses are expensive with recent cryptography releases, so
+        # only try RSA first when the header says it is one
+        if b"BEGIN RSA" in header:
+            key_classes = (paramiko.RSAKey,)
+        elif b"BEGIN EC" in header:
+            key_classes = (paramiko.ECDSAKey,)
+        elif b"BEGIN OPENSSH" in header:
+            # The OpenSSH container doesn't name the key type; ed25519 is the common case
+            key_classes = (paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.RSAKey)
+        else:
+            key_classes = (paramiko.RSAKey, paramiko.Ed25519Key, paramiko.ECDSAKey)
+        
+        for key_class in key_classes:
+            try:
+                private_key = key_class.from_private_key_file(ssh_key_path)
+            except paramiko.ssh_exception.SSHException:
+                continue
+            logger.debug("Loaded %s key", private_key.get_name())
+            return private_key
+        
+        logger.error(f"Unsupported SSH key type: {ssh_key_path}")
+        raise ValueError(f"Unsupported SSH key type: {ssh_key_path}")
     
     @staticmethod
     def _get_ssh_client(target: Target, deployment_id: Optional[int] = None) -> paramiko.SSHClient:
@@ -213,32 +540,24 @@ class DeploymentService:
             add_deployment_log(deployment_id, "INFO", log_msg)
         
         ssh = paramiko.SSHClient()
+        # Host keys are auto-accepted, so known_hosts is deliberately never loaded
+        # (load_system_host_keys parses the whole file on every connect)
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         
         # Expand user home directory (~) and resolve absolute path
         ssh_key_path = os.path.expanduser(target.ssh_key_path)
         ssh_key_path = os.path.abspath(ssh_key_path)
         
-        logger.debug(f"Resolved SSH key path: {ssh_key_path}")
+        logger.debug("Resolved SSH key path: %s", ssh_key_path)
         
         # Load private key (support both RSA and ED25519)
         if not os.path.exists(ssh_key_path):
             logger.error(f"SSH key not found: {ssh_key_path} (original: {target.ssh_key_path})")
             raise FileNotFoundError(f"SSH key not found: {ssh_key_path}")
         
-        logger.debug(f"Loading SSH key from: {ssh_key_path}")
+        logger.debug("Loading SSH key from: %s", ssh_key_path)
         
-        # Try RSA first, then ED25519
-        try:
-            private_key = paramiko.RSAKey.from_private_key_file(ssh_key_path)
-            logger.debug("Loaded RSA key")
-        except paramiko.ssh_exception.SSHException:
-            try:
-                private_key = paramiko.Ed25519Key.from_private_key_file(ssh_key_path)
-                logger.debug("Loaded ED25519 key")
-            except paramiko.ssh_exception.SSHException:
-                logger.error(f"Unsupported SSH key type: {ssh_key_path}")
-                raise ValueError(f"Unsupported SSH key type: {ssh_key_path}")
+        private_key = DeploymentService._load_private_key(ssh_key_path, os.stat(ssh_key_path).st_mtime)
         
         # Connect to remote host
         try:
@@ -246,8 +565,17 @@ class DeploymentService:
                 hostname=target.address,
                 username=target.ssh_user,
                 pkey=private_key,
-                timeout=10
+                timeout=10,
+                disabled_algorithms=_DISABLED_SSH_ALGORITHMS,
+                compress=settings.ssh_compress,
+                transport_factory=_GCMFirstTransport
             )
+            transport = ssh.get_transport()
+            # Keepalives stop NATs/firewalls from silently dropping pooled idle connections
+            transport.set_keepalive(settings.ssh_keepalive_seconds)
+            # Commands are small writes answered by small reads; don't let Nagle
+            # hold them back waiting for delayed ACKs
+            transport.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             success_msg = f"Successfully connected to {target.address}"
             logger.info(success_msg)
             if deployment_id:
@@ -261,214 +589,402 @@ class DeploymentService:
         
         return ssh
     
+    @staticmethod
+    def _is_connection_error(error: BaseException) -> bool:
+        """Whether error means the SSH connection itself failed (not e.g. a missing local file)."""
+        if isinstance(error, (EOFError, paramiko.SSHException, ConnectionError, TimeoutError)):
+            return True
+        # paramiko and the socket module raise plain OSError for a closed socket or
+        # unreachable host; subclasses like FileNotFoundError say nothing about the connection
+        return type(error) is OSError
+    
+    @staticmethod
+    @contextmanager
+    def _ssh_session(target: Target, deployment_id: Optional[int] = None, ssh: Optional[paramiko.SSHClient] = None) -> Iterator[paramiko.SSHClient]:
+        """Lease a pooled SSH connection to target, connecting if none is idle.
+        
+        If the caller already holds a connection (ssh), use it as-is; the caller
+        stays responsible for it.
+        """
+        if ssh is not None:
+            try:
+                yield ssh
+            except Exception as e:
+                DeploymentService._forget_host_caps_on_error(target, e)
+                raise
+            return
+        
+        ssh = _ssh_pool.acquire(target)
+        if ssh is None:
+            ssh = DeploymentService._get_ssh_client(target, deployment_id)
+        else:
+            log_msg = f"Reusing SSH connection to {target.name} ({target.address})"
+            logger.info(log_msg)
+            if deployment_id:
+                add_deployment_log(deployment_id, "INFO", log_msg)
+        
+        try:
+            yield ssh
+        except BaseException as e:
+            if DeploymentService._is_connection_error(e):
+                # The connection itself may be broken; don't hand it out again
+                ssh.close()
+                logger.info(f"Closed SSH connection to {target.address}")
+                raise
+            _ssh_pool.release(target, ssh)
+            DeploymentService._forget_host_caps_on_error(target, e)
+            raise
+        else:
+            _ssh_pool.release(target, ssh)
+    
+    @staticmethod
+    def _get_remote_shell(ssh: paramiko.SSHClient) -> Optional[_RemoteShell]:
+        """Return the connection's persistent shell, starting one if needed (None if that fails)."""
+        with _remote_shells_lock:
+            shell = getattr(ssh, _REMOTE_SHELL_ATTR, None)
+            if shell is False:
+                # The shell didn't work on this connection before; don't retry it per command
+                return None
+            if shell is not None and shell.usable:
+                return shell
+            try:
+                shell = _RemoteShell(ssh)
+            except (EOFError, OSError, paramiko.SSHException) as e:
+                logger.debug("Persistent shell unavailable, using a channel per command: %s", e)
+                return None
+            setattr(ssh, _REMOTE_SHELL_ATTR, shell)
+            return shell
+    
+    @staticmethod
+    def _drain_channel(channel: paramiko.Channel) -> tuple[int, bytes, bytes]:
+        """Read stdout and stderr together until the command exits; return exit status and both outputs.
+        
+        Reading one stream to EOF before the other (or waiting on the exit status
+        first) lets a chatty command fill the channel window and stall.
+        """
+        stdout_buf, stderr_buf = bytearray(), bytearray()
+        while True:
+            while channel.recv_ready():
+                stdout_buf += channel.recv(_RECV_CHUNK)
+            while channel.recv_stderr_ready():
+                stderr_buf += channel.recv_stderr(_RECV_CHUNK)
+            if channel.exit_status_ready() and (channel.eof_received or channel.closed):
+                break
+            # The channel's fd only signals stdout data, so also wake up
+            # periodically for stderr
+            select.select([channel], [], [], _RECV_POLL_SECONDS)
+        
+        # Anything that arrived between the last read and EOF
+        while chunk := channel.recv(_RECV_CHUNK):
+            stdout_buf += chunk
+        while chunk := channel.recv_stderr(_RECV_CHUNK):
+            stderr_buf += chunk
+        return channel.recv_exit_status(), bytes(stdout_buf), bytes(stderr_buf)
+    
+    @staticmethod
+    def _run_remote(ssh: paramiko.SSHClient, command: str) -> tuple[int, bytes, bytes]:
+        """Run command on the connection's persistent shell if it's free, else on a new channel."""
+        shell = DeploymentService._get_remote_shell(ssh)
+        if shell is not None and shell.lock.acquire(blocking=False):
+            try:
+                return shell.run(command)
+            except _RemoteShellUnavailable as e:
+                # The shell never ran a command, so this one didn't run either:
+                # remember that and run it on its own channel below
+                shell.close()
+                logger.debug("Persistent shell exited on startup, using a channel per command: %s", e)
+                with _remote_shells_lock:
+                    setattr(ssh, _REMOTE_SHELL_ATTR, False)
+            except BaseException:
+                # Output may be half-read; never reuse this shell
+                shell.close()
+                raise
+            finally:
+                shell.lock.release()
+        
+        # No shell, it doesn't work on this host, or another thread is using it
+        # (parallel deployments sharing a connection): use a channel of our own
+        stdin, stdout, stderr = ssh.exec_command(command)
+        try:
+            return DeploymentService._drain_channel(stdout.channel)
+        finally:
+            # Close explicitly: pooled connections outlive this call, and an
+            # unclosed channel stays registered on the transport until GC
+            stdout.channel.close()
+    
     @staticmethod
     def _execute_command(ssh: paramiko.SSHClient, command: str, description: str, deployment_id: Optional[int] = None) -> tuple[int, str, str]:
         """Execute a command via SSH and return exit status, stdout, and stderr."""
         log_msg = f"Executing: {description}"
         logger.info(log_msg)
-        logger.debug(f"Command: {command}")
+        logger.debug("Command: %s", command)
         if deployment_id:
             add_deployment_log(deployment_id, "INFO", log_msg)
         
-        stdin, stdout, stderr = ssh.exec_command(command)
-        exit_status = stdout.channel.recv_exit_status()
-        stdout_text = stdout.read().decode().strip()
-        stderr_text = stderr.read().decode().strip()
+        exit_status, stdout_bytes, stderr_bytes = DeploymentService._run_remote(ssh, command)
+        # Decoded once, at the end; a stray non-UTF-8 byte in output shouldn't fail the command
+        stdout_text = stdout_bytes.decode(errors="replace").strip()
+        stderr_text = stderr_bytes.decode(errors="replace").strip()
         
+        # Collected and added to the deployment log in one go
+        result_logs = []
         if exit_status == 0:
             success_msg = f"✓ {description} - Success"
             logger.info(success_msg)
-            if deployment_id:
-                add_deployment_log(deployment_id, "INFO", success_msg)
+            result_logs.append(("INFO", success_msg))
             if stdout_text:
-                logger.debug(f"Output: {stdout_text}")
-                if deployment_id:
-                    add_deployment_log(deployment_id, "DEBUG", f"Output: {stdout_text}")
+                logger.debug("Output: %s", stdout_text)
+                result_logs.append(("DEBUG", f"Output: {stdout_text}"))
         else:
             fail_msg = f"✗ {description} - Failed (exit code: {exit_status})"
             logger.warning(fail_msg)
-            if deployment_id:
-                add_deployment_log(deployment_id, "WARNING", fail_msg)
+            result_logs.append(("WARNING", fail_msg))
             if stderr_text:
                 logger.warning(f"Error output: {stderr_text}")
-                if deployment_id:
-                    add_deployment_log(deployment_id, "ERROR", f"Error output: {stderr_text}")
+                result_logs.append(("ERROR", f"Error output: {stderr_text}"))
             if stdout_text:
-                logger.debug(f"Output: {stdout_text}")
-                if deployment_id:
-                    add_deployment_log(deployment_id, "DEBUG", f"Output: {stdout_text}")
+                logger.debug("Output: %s", stdout_text)
+                result_logs.append(("DEBUG", f"Output: {stdout_text}"))
+        if deployment_id:
+            add_deployment_logs(deployment_id, result_logs)
         
         return exit_status, stdout_text, stderr_text
     
     @staticmethod
-    def deploy_single_container(target: Target, image: str, container_name: str, ports: Optional[str] = None, deployment_id: Optional[int] = None) -> str:
+    def _execute_script(ssh: paramiko.SSHClient, steps: list[tuple[str, str]], deployment_id: Optional[int] = None) -> list[tuple[int, str]]:
+        """Run (command, description) steps as one remote shell script; return each step's exit status and output.
+        
+        Every step runs even if an earlier one failed, matching one exec_command per step,
+        but the whole list costs a single round-trip (on the persistent shell when it's free).
+        """
+        script_lines = []
+        for index, (command, _) in enumerate(steps):
+            script_lines.append(f"{{ {command}\n}} 2>&1")
+            script_lines.append(f"__manifold_step_rc=$?; printf '\\n%s%d:%d\\n' '{_STEP_MARKER}' {index} \"$__manifold_step_rc\"")
+        script = "\n".join(script_lines) + "\n"
+        
+        for command, description in steps:
+            logger.info("Executing: %s", description)
+            logger.debug("Command: %s", command)
+        if deployment_id:
+            add_deployment_logs(deployment_id, [("INFO", f"Executing: {description}") for _, description in steps])
+        
+        _, stdout_bytes, _ = DeploymentService._run_remote(ssh, script)
+        stdout_text = stdout_bytes.decode(errors="replace")
+        
+        results: list[tuple[int, str]] = [(-1, "")] * len(steps)
+        output_start = 0
+        for marker in _STEP_MARKER_RE.finditer(stdout_text):
+            results[int(marker.group(1))] = (int(marker.group(2)), stdout_text[output_start:marker.start()].strip())
+            output_start = marker.end()
+        
+        result_logs = []
+        for (_, description), (exit_status, output) in zip(steps, results):
+            if exit_status == 0:
+                result_msg, level = f"✓ {description} - Success", "INFO"
+            else:
+                result_msg, level = f"✗ {description} - Failed (exit code: {exit_status})", "WARNING"
+            logger.log(logging.getLevelName(level), result_msg)
+            if output:
+                logger.debug("Output: %s", output)
+            result_logs.append((level, result_msg))
+        if deployment_id:
+            add_deployment_logs(deployment_id, result_logs)
+        
+        return results
+    
+    @staticmethod
+    def _spec_hash(**spec) -> str:
+        """Short digest of a deployment spec, stored as a container label."""
+        return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+    
+    @staticmethod
+    def deploy_single_container(target: Target, image: str, container_name: str, ports: Optional[str] = None, deployment_id: Optional[int] = None, ssh: Optional[paramiko.SSHClient] = None) -> str:
         """Deploy a single Docker container on remote VM."""
         log_msg = f"Starting single container deployment: {container_name} ({image})"
         logger.info(log_msg)
         if deployment_id:
             add_deployment_log(deployment_id, "INFO", log_msg)
         
-        ssh = DeploymentService._get_ssh_client(target, deployment_id)
-        
         try:
-            # Check and install Docker if needed
-            DeploymentService._check_and_install_docker(ssh, target)
-            
-            # Get sudo prefix for docker commands (may need sudo if user not in docker group)
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh, deployment_id)
-            
-            # Check if user can run docker without sudo
-            test_docker_cmd = "docker ps >/dev/null 2>&1 && echo 'no_sudo' || echo 'needs_sudo'"
-            exit_status, docker_check, _ = DeploymentService._execute_command(
-                ssh, test_docker_cmd, "Check if docker needs sudo"
-            )
-            docker_sudo = "" if "no_sudo" in docker_check.lower() else sudo_prefix
-            
-            # Stop and remove existing container if it exists
-            stop_cmd = f"{docker_sudo}docker stop {container_name} 2>/dev/null || true"
-            DeploymentService._execute_command(ssh, stop_cmd, f"Stop existing container '{container_name}'")
-            
-            remove_cmd = f"{docker_sudo}docker rm {container_name} 2>/dev/null || true"
-            DeploymentService._execute_command(ssh, remove_cmd, f"Remove existing container '{container_name}'")
-            
-            # Build docker run command
-            docker_cmd = f"{docker_sudo}docker run -d --name {container_name}"
-            
-            if ports:
+            with DeploymentService._ssh_session(target, deployment_id, ssh) as ssh:
+                # Check and install Docker if needed
+                DeploymentService._check_and_install_docker(ssh, target)
+                
+                # sudo is only needed if the user isn't in the docker group
+                docker_sudo = DeploymentService._get_host_caps(ssh, target, deployment_id).docker_sudo
+                
                 # Handle port mappings (e.g., "8080:80" or "8080:80,8443:443")
-                port_mappings = [p.strip() for p in ports.split(",")]
-                logger.info(f"Configuring port mappings: {', '.join(port_mappings)}")
-                for port_map in port_mappings:
-                    docker_cmd += f" -p {port_map}"
-            
-            docker_cmd += f" {image}"
-            
-            # Execute docker run
-            exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
-                ssh, docker_cmd, f"Deploy container '{container_name}'"
-            )
-            
-            if exit_status != 0:
-                error_msg = f"Docker run failed: {stderr_text or 'Unknown error'}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-            
-            container_id = stdout_text.strip()
-            if container_id:
-                success_msg = f"Container {container_name} deployed successfully (ID: {container_id[:12]})"
-                logger.info(success_msg)
-                return success_msg
-            else:
-                error_msg = "Docker run succeeded but no container ID returned"
-                logger.error(error_msg)
-                raise Exception(error_msg)
+                port_mappings = _PORTS_ADAPTER.validate_python(ports.split(",")) if ports else []
+                
+                # Skip the redeploy if a running container was started from the same spec
+                spec_hash = DeploymentService._spec_hash(image=image, container_name=container_name, ports=port_mappings)
+                quoted_name = shlex.quote(container_name)
+                inspect_cmd = (
+                    f"{docker_sudo}docker inspect -f "
+                    f"'{{{{index .Config.Labels \"{_SPEC_HASH_LABEL}\"}}}} {{{{.State.Running}}}}' {quoted_name} 2>/dev/null || true"
+                )
+                exit_status, current_spec, _ = DeploymentService._execute_command(
+                    ssh, inspect_cmd, f"Check existing container '{container_name}'", deployment_id
+                )
+                if current_spec == f"{spec_hash} true":
+                    success_msg = f"Container {container_name} is already up to date"
+                    logger.info(success_msg)
+                    return success_msg
+                
+                # Build docker run command as an argv list, quoted once at the end
+                docker_args = ["docker", "run", "-d", "--name", container_name, "--label", f"{_SPEC_HASH_LABEL}={spec_hash}"]
+                
+                if port_mappings:
+                    logger.info(f"Configuring port mappings: {', '.join(port_mappings)}")
+                    docker_args.extend(itertools.chain.from_iterable(("-p", port_map) for port_map in port_mappings))
+                
+                docker_args.append(image)
+                docker_cmd = docker_sudo + shlex.join(docker_args)
+                
+                # Force-remove any existing container, then run, in one exec_command.
+                # rm output is discarded so stdout is just the new container ID.
+                combined_cmd = f"{docker_sudo}docker rm -f {quoted_name} >/dev/null 2>&1 || true; {docker_cmd}"
+                exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
+                    ssh, combined_cmd, f"Replace and deploy container '{container_name}'"
+                )
+                
+                if exit_status != 0:
+                    error_msg = f"Docker run failed: {stderr_text or 'Unknown error'}"
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
+                
+                container_id = stdout_text.strip().rsplit("\n", 1)[-1]
+                if container_id:
+                    success_msg = f"Container {container_name} deployed successfully (ID: {container_id[:12]})"
+                    logger.info(success_msg)
+                    return success_msg
+                else:
+                    error_msg = "Docker run succeeded but no container ID returned"
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
             
         except Exception as e:
             logger.error(f"Deployment failed: {str(e)}")
             raise
-        finally:
-            ssh.close()
-            logger.info(f"Closed SSH connection to {target.address}")
     
     @staticmethod
-    def deploy_compose_file(target: Target, compose_file_path: str, deployment_id: Optional[int] = None) -> str:
+    def deploy_compose_file(target: Target, compose_file_path: str, deployment_id: Optional[int] = None, ssh: Optional[paramiko.SSHClient] = None) -> str:
         """Deploy Docker Compose stack on remote VM."""
         log_msg = f"Starting Docker Compose deployment from: {compose_file_path}"
         logger.info(log_msg)
         if deployment_id:
             add_deployment_log(deployment_id, "INFO", log_msg)
         
-        ssh = DeploymentService._get_ssh_client(target, deployment_id)
-        
         try:
-            # Check and install Docker if needed
-            DeploymentService._check_and_install_docker(ssh, target)
-            
-            # Get sudo prefix for docker commands (may need sudo if user not in docker group)
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh, deployment_id)
-            
-            # Check if user can run docker without sudo
-            test_docker_cmd = "docker ps >/dev/null 2>&1 && echo 'no_sudo' || echo 'needs_sudo'"
-            exit_status, docker_check, _ = DeploymentService._execute_command(
-                ssh, test_docker_cmd, "Check if docker needs sudo"
-            )
-            docker_sudo = "" if "no_sudo" in docker_check.lower() else sudo_prefix
-            
-            # Change to directory containing docker-compose.yml
-            compose_dir = os.path.dirname(compose_file_path)
-            compose_file = os.path.basename(compose_file_path)
-            
-            logger.info(f"Compose directory: {compose_dir}, file: {compose_file}")
-            
-            # Check if compose file exists
-            check_cmd = f"test -f {compose_file_path} && echo 'exists' || echo 'not found'"
-            exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
-                ssh, check_cmd, f"Check if compose file exists: {compose_file_path}"
-            )
-            
-            if "not found" in stdout_text.lower():
-                error_msg = f"Docker Compose file not found: {compose_file_path}"
-                logger.error(error_msg)
-                raise FileNotFoundError(error_msg)
-            
-            # Navigate to directory and run docker compose up
-            docker_compose_cmd = f"cd {compose_dir} && {docker_sudo}docker compose -f {compose_file} up -d"
-            
-            exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
-                ssh, docker_compose_cmd, f"Deploy Docker Compose stack from {compose_file_path}"
-            )
-            
-            if exit_status != 0:
-                error_msg = f"Docker Compose deployment failed: {stderr_text or 'Unknown error'}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-            
-            success_msg = f"Docker Compose stack deployed successfully from {compose_file_path}"
-            logger.info(success_msg)
-            if stdout_text:
-                logger.debug(f"Compose output: {stdout_text}")
-            
-            return success_msg
+            with DeploymentService._ssh_session(target, deployment_id, ssh) as ssh:
+                # Check and install Docker if needed
+                DeploymentService._check_and_install_docker(ssh, target)
+                
+                # sudo is only needed if the user isn't in the docker group
+                docker_sudo = DeploymentService._get_host_caps(ssh, target, deployment_id).docker_sudo
+                
+                # Change to directory containing docker-compose.yml
+                compose_dir = os.path.dirname(compose_file_path)
+                compose_file = os.path.basename(compose_file_path)
+                
+                logger.info(f"Compose directory: {compose_dir}, file: {compose_file}")
+                
+                # Check the compose file exists, then navigate to its directory
+                # and run docker compose up, all in one exec_command
+                docker_compose_cmd = (
+                    f"test -f {compose_file_path} || exit {_COMPOSE_FILE_MISSING_EXIT}; "
+                    f"cd {compose_dir or '.'} && {docker_sudo}docker compose -f {compose_file} up -d"
+                )
+                
+                exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
+                    ssh, docker_compose_cmd, f"Deploy Docker Compose stack from {compose_file_path}"
+                )
+                
+                if exit_status == _COMPOSE_FILE_MISSING_EXIT:
+                    error_msg = f"Docker Compose file not found: {compose_file_path}"
+                    logger.error(error_msg)
+                    raise FileNotFoundError(error_msg)
+                
+                if exit_status != 0:
+                    error_msg = f"Docker Compose deployment failed: {stderr_text or 'Unknown error'}"
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
+                
+                success_msg = f"Docker Compose stack deployed successfully from {compose_file_path}"
+                logger.info(success_msg)
+                if stdout_text:
+                    logger.debug("Compose output: %s", stdout_text)
+                
+                return success_msg
             
         except Exception as e:
             logger.error(f"Docker Compose deployment failed: {str(e)}")
             raise
-        finally:
-            ssh.close()
-            logger.info(f"Closed SSH connection to {target.address}")
     
     @staticmethod
-    def deploy(request: DeploymentApplyRequest, target: Target, deployment_id: Optional[int] = None) -> str:
+    def deploy(request: DeploymentApplyRequest, target: Target, deployment_id: Optional[int] = None, ssh: Optional[paramiko.SSHClient] = None) -> str:
         """Deploy based on request type."""
+        provisioned = target.docker_checked_at is not None
+        try:
+            return DeploymentService._deploy_once(request, target, deployment_id, ssh)
+        except Exception:
+            # The Docker check was skipped, and the failure cleared the
+            # provisioned mark: check (and install) Docker, then try once more
+            if not provisioned or target.docker_checked_at is not None:
+                raise
+            log_msg = f"Docker appears to be missing on {target.address}, re-checking and retrying"
+            logger.warning(log_msg)
+            if deployment_id:
+                add_deployment_log(deployment_id, "WARNING", log_msg)
+            return DeploymentService._deploy_once(request, target, deployment_id, ssh)
+    
+    @staticmethod
+    def _deploy_once(request: DeploymentApplyRequest, target: Target, deployment_id: Optional[int] = None, ssh: Optional[paramiko.SSHClient] = None) -> str:
+        """Dispatch to the single container or compose deployment."""
         if request.compose_file_path:
-            return DeploymentService.deploy_compose_file(target, request.compose_file_path, deployment_id)
+            return DeploymentService.deploy_compose_file(target, request.compose_file_path, deployment_id, ssh)
         else:
             return DeploymentService.deploy_single_container(
                 target,
                 request.image,
                 request.container_name,
                 request.ports,
-                deployment_id
+                deployment_id,
+                ssh
             )
     
     @staticmethod
-    def list_containers(target: Target) -> list[dict]:
-        """List all containers on a target."""
-        ssh = DeploymentService._get_ssh_client(target)
+    def deploy_to_target(target: Target, jobs: list[tuple[DeploymentApplyRequest, Optional[int]]]) -> list[str | BaseException]:
+        """Run several (request, deployment_id) deployments on one target over a single SSH connection.
         
-        try:
-            # Get sudo prefix
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh)
+        The deployments run in parallel as separate channels on the shared transport,
+        which is much cheaper than a connection (TCP + SSH handshake) per deployment.
+        Results are in job order; a failed deployment yields its exception.
+        """
+        if not jobs:
+            return []
+        
+        with DeploymentService._ssh_session(target) as ssh:
+            # Docker only needs checking once for all of them
+            DeploymentService._check_and_install_docker(ssh, target)
             
-            # Check if user can run docker without sudo
-            test_docker_cmd = "docker ps >/dev/null 2>&1 && echo 'no_sudo' || echo 'needs_sudo'"
-            exit_status, docker_check, _ = DeploymentService._execute_command(
-                ssh, test_docker_cmd, "Check if docker needs sudo"
-            )
-            docker_sudo = "" if "no_sudo" in docker_check.lower() else sudo_prefix
+            with ThreadPoolExecutor(max_workers=min(len(jobs), _MAX_CHANNELS_PER_TARGET)) as executor:
+                futures = [
+                    executor.submit(DeploymentService.deploy, request, target, deployment_id, ssh)
+                    for request, deployment_id in jobs
+                ]
+                return [future.exception() or future.result() for future in futures]
+    
+    @staticmethod
+    def list_containers(target: Target) -> list[dict]:
+        """List all containers on a target."""
+        with DeploymentService._ssh_session(target) as ssh:
+            # sudo is only needed if the user isn't in the docker group
+            docker_sudo = DeploymentService._get_host_caps(ssh, target).docker_sudo
             
             # List all containers (running and stopped)
-            list_cmd = f"{docker_sudo}docker ps -a --format '{{{{.ID}}}}\\t{{{{.Names}}}}\\t{{{{.Image}}}}\\t{{{{.Status}}}}\\t{{{{.Ports}}}}'"
+            list_cmd = f"{docker_sudo}docker ps -a --format '{{{{json .}}}}'"
             exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
                 ssh, list_cmd, "List containers"
             )
@@ -476,43 +992,31 @@ class DeploymentService:
             if exit_status != 0:
                 raise Exception(f"Failed to list containers: {stderr_text}")
             
+            # One JSON object per line, so names/ports can't be split on a stray tab
             containers = []
-            for line in stdout_text.strip().split('\n'):
+            for line in stdout_text.splitlines():
                 if not line.strip():
                     continue
-                parts = line.split('\t')
-                if len(parts) >= 4:
-                    containers.append({
-                        "id": parts[0][:12],  # Short container ID
-                        "name": parts[1],
-                        "image": parts[2],
-                        "status": parts[3],
-                        "ports": parts[4] if len(parts) > 4 else ""
-                    })
+                info = json.loads(line)
+                containers.append({
+                    "id": info["ID"][:12],  # Short container ID
+                    "name": info["Names"],
+                    "image": info["Image"],
+                    "status": info["Status"],
+                    "ports": info.get("Ports", "")
+                })
             
             return containers
-            
-        finally:
-            ssh.close()
     
     @staticmethod
     def get_container_logs(target: Target, container_name: str, lines: int = 100) -> str:
         """Get logs for a specific container."""
-        ssh = DeploymentService._get_ssh_client(target)
-        
-        try:
-            # Get sudo prefix
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh)
-            
-            # Check if user can run docker without sudo
-            test_docker_cmd = "docker ps >/dev/null 2>&1 && echo 'no_sudo' || echo 'needs_sudo'"
-            exit_status, docker_check, _ = DeploymentService._execute_command(
-                ssh, test_docker_cmd, "Check if docker needs sudo"
-            )
-            docker_sudo = "" if "no_sudo" in docker_check.lower() else sudo_prefix
+        with DeploymentService._ssh_session(target) as ssh:
+            # sudo is only needed if the user isn't in the docker group
+            docker_sudo = DeploymentService._get_host_caps(ssh, target).docker_sudo
             
             # Get container logs
-            logs_cmd = f"{docker_sudo}docker logs --tail {lines} {container_name} 2>&1"
+            logs_cmd = f"{docker_sudo}docker logs --tail {int(lines)} {shlex.quote(container_name)} 2>&1"
             exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
                 ssh, logs_cmd, f"Get logs for container {container_name}"
             )
@@ -521,28 +1025,16 @@ class DeploymentService:
             combined_logs = stdout_text + "\n" + stderr_text if stderr_text else stdout_text
             
             return combined_logs.strip()
-            
-        finally:
-            ssh.close()
     
     @staticmethod
     def get_container_env(target: Target, container_name: str) -> dict:
         """Get environment variables for a container."""
-        ssh = DeploymentService._get_ssh_client(target)
-        
-        try:
-            # Get sudo prefix
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh)
-            
-            # Check if user can run docker without sudo
-            test_docker_cmd = "docker ps >/dev/null 2>&1 && echo 'no_sudo' || echo 'needs_sudo'"
-            exit_status, docker_check, _ = DeploymentService._execute_command(
-                ssh, test_docker_cmd, "Check if docker needs sudo"
-            )
-            docker_sudo = "" if "no_sudo" in docker_check.lower() else sudo_prefix
+        with DeploymentService._ssh_session(target) as ssh:
+            # sudo is only needed if the user isn't in the docker group
+            docker_sudo = DeploymentService._get_host_caps(ssh, target).docker_sudo
             
             # Get container inspect to extract env vars
-            inspect_cmd = f"{docker_sudo}docker inspect {container_name} --format '{{{{json .Config.Env}}}}'"
+            inspect_cmd = f"{docker_sudo}docker inspect {shlex.quote(container_name)} --format '{{{{json .Config.Env}}}}'"
             exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
                 ssh, inspect_cmd, f"Get env vars for container {container_name}"
             )
@@ -550,7 +1042,6 @@ class DeploymentService:
             if exit_status != 0:
                 raise Exception(f"Failed to get container env: {stderr_text}")
             
-            import json
             env_list = json.loads(stdout_text.strip())
             
             # Parse env vars into dict (format: KEY=VALUE)
@@ -563,28 +1054,17 @@ class DeploymentService:
                     env_dict[env_var] = ""
             
             return env_dict
-            
-        finally:
-            ssh.close()
     
     @staticmethod
     def update_container_env(target: Target, container_name: str, env_vars: dict) -> str:
         """Update environment variables for a container by recreating it."""
-        ssh = DeploymentService._get_ssh_client(target)
-        
-        try:
-            # Get sudo prefix
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh)
-            
-            # Check if user can run docker without sudo
-            test_docker_cmd = "docker ps >/dev/null 2>&1 && echo 'no_sudo' || echo 'needs_sudo'"
-            exit_status, docker_check, _ = DeploymentService._execute_command(
-                ssh, test_docker_cmd, "Check if docker needs sudo"
-            )
-            docker_sudo = "" if "no_sudo" in docker_check.lower() else sudo_prefix
+        with DeploymentService._ssh_session(target) as ssh:
+            # sudo is only needed if the user isn't in the docker group
+            docker_sudo = DeploymentService._get_host_caps(ssh, target).docker_sudo
             
-            # Get container configuration
-            inspect_cmd = f"{docker_sudo}docker inspect {container_name}"
+            # Get container configuration (env, ports, image and command in one inspect)
+            quoted_name = shlex.quote(container_name)
+            inspect_cmd = f"{docker_sudo}docker inspect {quoted_name}"
             exit_status, inspect_output, stderr_text = DeploymentService._execute_command(
                 ssh, inspect_cmd, f"Inspect container {container_name}"
             )
@@ -592,7 +1072,6 @@ class DeploymentService:
             if exit_status != 0:
                 raise Exception(f"Failed to inspect container: {stderr_text}")
             
-            import json
             container_info = json.loads(inspect_output)[0]
             config = container_info['Config']
             host_config = container_info['HostConfig']
@@ -600,168 +1079,115 @@ class DeploymentService:
             # Get image
             image = config['Image']
             
-            # Get command
-            cmd = config.get('Cmd', [])
-            cmd_str = ' '.join(cmd) if cmd else ''
+            # Build the new docker run command as an argv list, quoted once at the end
+            docker_args = ["docker", "run", "-d", "--name", container_name]
             
-            # Get port bindings
-            port_bindings = host_config.get('PortBindings', {})
-            port_args = []
+            # Keep the port bindings
+            port_bindings = host_config.get('PortBindings') or {}
             for container_port, bindings in port_bindings.items():
                 if bindings:
                     host_port = bindings[0]['HostPort']
-                    port_args.append(f"-p {host_port}:{container_port.split('/')[0]}")
+                    docker_args += ["-p", f"{host_port}:{container_port.split('/')[0]}"]
             
-            # Build env var arguments (properly escape values)
-            env_args = []
+            # Env var arguments; shlex.join below quotes the values for the shell
             for key, value in env_vars.items():
-                # Escape special characters in value
-                escaped_value = str(value).replace('"', '\\"').replace('$', '\\$')
-                env_args.append(f'-e {key}="{escaped_value}"')
-            
-            # Stop and remove old container
-            stop_cmd = f"{docker_sudo}docker stop {container_name}"
-            DeploymentService._execute_command(ssh, stop_cmd, f"Stop container {container_name}")
-            
-            remove_cmd = f"{docker_sudo}docker rm {container_name}"
-            DeploymentService._execute_command(ssh, remove_cmd, f"Remove container {container_name}")
-            
-            # Create new container with updated env vars
-            docker_run_cmd = f"{docker_sudo}docker run -d --name {container_name}"
-            if port_args:
-                docker_run_cmd += " " + " ".join(port_args)
-            if env_args:
-                docker_run_cmd += " " + " ".join(env_args)
-            docker_run_cmd += f" {image}"
-            if cmd_str:
-                docker_run_cmd += f" {cmd_str}"
+                docker_args += ["-e", f"{key}={value}"]
             
+            # Keep the image and command
+            docker_args.append(image)
+            docker_args.extend(config.get('Cmd') or [])
+            
+            # Force-remove the old container and start the new one in one exec_command
+            recreate_cmd = (
+                f"{docker_sudo}docker rm -f {quoted_name} >/dev/null 2>&1 || true; "
+                f"{docker_sudo}{shlex.join(docker_args)}"
+            )
             exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
-                ssh, docker_run_cmd, f"Recreate container {container_name} with new env vars"
+                ssh, recreate_cmd, f"Recreate container {container_name} with new env vars"
             )
             
             if exit_status != 0:
                 raise Exception(f"Failed to recreate container: {stderr_text}")
             
             return f"Container {container_name} restarted with updated environment variables"
-            
-        finally:
-            ssh.close()
     
     @staticmethod
-    def get_target_env(target: Target) -> dict:
-        """Get environment variables from VM's /etc/environment file."""
-        ssh = DeploymentService._get_ssh_client(target)
-        
-        try:
+    def get_target_env(target: Target, source: Literal["file", "merged"] = "merged") -> dict:
+        """Get environment variables from VM's /etc/environment file (merged with the shell env unless source is "file")."""
+        with DeploymentService._ssh_session(target) as ssh:
             # Get sudo prefix
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh)
+            sudo_prefix = DeploymentService._get_sudo_prefix(ssh, target)
             
-            # Read /etc/environment file
-            read_cmd = f"{sudo_prefix}cat /etc/environment 2>/dev/null || echo ''"
-            exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
-                ssh, read_cmd, "Read /etc/environment"
-            )
+            # Read /etc/environment and, if wanted, the current shell environment in one round-trip
+            steps = [(f"{sudo_prefix}cat /etc/environment 2>/dev/null || echo ''", "Read /etc/environment")]
+            if source == "merged":
+                steps.append(("env | grep -v '^_' | sort", "Get current environment"))
+            (_, stdout_text), *env_result = DeploymentService._execute_script(ssh, steps)
             
-            env_dict = {}
-            if stdout_text.strip():
-                for line in stdout_text.strip().split('\n'):
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        env_dict[key.strip()] = value.strip().strip('"').strip("'")
-            
-            # Also get current shell environment for comparison
-            env_cmd = "env | grep -v '^_' | sort"
-            exit_status, env_output, _ = DeploymentService._execute_command(
-                ssh, env_cmd, "Get current environment"
-            )
+            env_dict = {key: value.strip('"').strip("'") for key, value in _ETC_ENV_RE.findall(stdout_text)}
             
             # Merge shell env vars (prioritize /etc/environment if both exist)
-            if env_output.strip():
-                for line in env_output.strip().split('\n'):
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        if key not in env_dict:  # Only add if not already in /etc/environment
-                            env_dict[key] = value.strip()
+            for _, env_output in env_result:
+                for key, value in _SHELL_ENV_RE.findall(env_output):
+                    env_dict.setdefault(key, value)
             
             return env_dict
-            
-        finally:
-            ssh.close()
     
     @staticmethod
     def update_target_env(target: Target, env_vars: dict) -> str:
         """Update environment variables in VM's /etc/environment file."""
-        ssh = DeploymentService._get_ssh_client(target)
-        
-        try:
+        with DeploymentService._ssh_session(target) as ssh:
             # Get sudo prefix
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh)
-            
-            # Backup original file
-            backup_cmd = f"{sudo_prefix}cp /etc/environment /etc/environment.backup.$(date +%s) 2>/dev/null || true"
-            DeploymentService._execute_command(ssh, backup_cmd, "Backup /etc/environment")
-            
-            # Build new environment file content
-            env_lines = []
-            for key, value in env_vars.items():
-                # Escape special characters properly for shell
-                escaped_key = str(key).replace('"', '\\"').replace('$', '\\$')
-                escaped_value = str(value).replace('"', '\\"').replace('$', '\\$')
-                env_lines.append(f'{escaped_key}="{escaped_value}"')
-            
-            env_content = '\n'.join(env_lines) + '\n'
-            
-            # Write to temporary file first, then move to /etc/environment
-            import time
-            import base64
-            temp_file = f"/tmp/environment.{target.id}.{int(time.time())}"
-            
-            # Base64 encode the content to avoid shell escaping issues
-            encoded_content = base64.b64encode(env_content.encode()).decode()
-            write_cmd = f"echo '{encoded_content}' | base64 -d | {sudo_prefix}tee {temp_file} > /dev/null"
-            exit_status, _, stderr_text = DeploymentService._execute_command(
-                ssh, write_cmd, f"Write to temp file {temp_file}"
-            )
-            
-            if exit_status != 0:
-                raise Exception(f"Failed to write temp file: {stderr_text}")
-            
-            # Move temp file to /etc/environment
-            move_cmd = f"{sudo_prefix}mv {temp_file} /etc/environment"
-            exit_status, _, stderr_text = DeploymentService._execute_command(
-                ssh, move_cmd, "Move temp file to /etc/environment"
-            )
-            
-            if exit_status != 0:
-                raise Exception(f"Failed to update /etc/environment: {stderr_text}")
-            
-            # Set proper permissions
-            chmod_cmd = f"{sudo_prefix}chmod 644 /etc/environment"
-            DeploymentService._execute_command(ssh, chmod_cmd, "Set /etc/environment permissions")
+            sudo_prefix = DeploymentService._get_sudo_prefix(ssh, target)
+            
+            # Build new environment file content, escaping " and $ in one pass per string
+            env_content = '\n'.join(
+                f'{str(key).translate(_ENV_ESCAPES)}="{str(value).translate(_ENV_ESCAPES)}"'
+                for key, value in env_vars.items()
+            ) + '\n'
+            
+            # Write to temporary file first, then move to /etc/environment. The backup
+            # and temp file share a timestamp taken here rather than by `date` remotely
+            timestamp = int(time.time())
+            temp_file = f"/tmp/environment.{target.id}.{timestamp}"
+            
+            # The content goes in a quoted heredoc, so the shell passes it to tee
+            # verbatim; the random delimiter can't collide with an env line
+            delimiter = f"MANIFOLD_ENV_{uuid.uuid4().hex}"
+            
+            # Backup, write, move and chmod as one script. A failed write removes the
+            # partial temp file, so the move fails too and /etc/environment is untouched.
+            results = DeploymentService._execute_script(ssh, [
+                (f"{sudo_prefix}cp /etc/environment /etc/environment.backup.{timestamp} 2>/dev/null || true", "Backup /etc/environment"),
+                (
+                    f"{sudo_prefix}tee {temp_file} > /dev/null <<'{delimiter}' || {{ {sudo_prefix}rm -f {temp_file}; false; }}\n"
+                    f"{env_content}{delimiter}",
+                    f"Write to temp file {temp_file}",
+                ),
+                (f"{sudo_prefix}mv {temp_file} /etc/environment", "Move temp file to /etc/environment"),
+                (f"{sudo_prefix}chmod 644 /etc/environment", "Set /etc/environment permissions"),
+            ])
+            _, (write_status, write_output), (move_status, move_output), _ = results
+            
+            if write_status != 0:
+                raise Exception(f"Failed to write temp file: {write_output}")
+            if move_status != 0:
+                raise Exception(f"Failed to update /etc/environment: {move_output}")
+            
+            # Here rather than in the route, so bulk updates drop cached reads too
+            cache.delete(make_key("target-env", target.id))
             
             return f"VM environment variables updated. Changes will take effect for new sessions. Run 'source /etc/environment' or restart the session to apply immediately."
-            
-        finally:
-            ssh.close()
-            logger.info(f"Closed SSH connection to {target.address}")
 
     @staticmethod
     def stop_container(target: Target, container_name: str) -> str:
         """Stop a Docker container on remote VM."""
         logger.info(f"Stopping container '{container_name}' on {target.address}")
-        ssh = DeploymentService._get_ssh_client(target)
-        try:
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh)
-            test_docker_cmd = "docker ps >/dev/null 2>&1 && echo 'no_sudo' || echo 'needs_sudo'"
-            exit_status, docker_check, _ = DeploymentService._execute_command(
-                ssh, test_docker_cmd, "Check if docker needs sudo"
-            )
-            docker_sudo = "" if "no_sudo" in docker_check.lower() else sudo_prefix
+        with DeploymentService._ssh_session(target) as ssh:
+            # sudo is only needed if the user isn't in the docker group
+            docker_sudo = DeploymentService._get_host_caps(ssh, target).docker_sudo
 
-            stop_cmd = f"{docker_sudo}docker stop {container_name}"
+            stop_cmd = f"{docker_sudo}docker stop {shlex.quote(container_name)}"
             exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
                 ssh, stop_cmd, f"Stop container '{container_name}'"
             )
@@ -770,29 +1196,21 @@ class DeploymentService:
                 raise Exception(f"Failed to stop container: {stderr_text}")
             
             return f"Container {container_name} stopped successfully"
-        finally:
-            ssh.close()
-            logger.info(f"Closed SSH connection to {target.address}")
 
     @staticmethod
     def delete_container(target: Target, container_name: str) -> str:
         """Delete a Docker container on remote VM (stops it first if running)."""
         logger.info(f"Deleting container '{container_name}' on {target.address}")
-        ssh = DeploymentService._get_ssh_client(target)
-        try:
-            sudo_prefix = DeploymentService._get_sudo_prefix(ssh)
-            test_docker_cmd = "docker ps >/dev/null 2>&1 && echo 'no_sudo' || echo 'needs_sudo'"
-            exit_status, docker_check, _ = DeploymentService._execute_command(
-                ssh, test_docker_cmd, "Check if docker needs sudo"
-            )
-            docker_sudo = "" if "no_sudo" in docker_check.lower() else sudo_prefix
+        with DeploymentService._ssh_session(target) as ssh:
+            # sudo is only needed if the user isn't in the docker group
+            docker_sudo = DeploymentService._get_host_caps(ssh, target).docker_sudo
 
             # Stop container first if it's running
-            stop_cmd = f"{docker_sudo}docker stop {container_name} 2>/dev/null || true"
+            stop_cmd = f"{docker_sudo}docker stop {shlex.quote(container_name)} 2>/dev/null || true"
             DeploymentService._execute_command(ssh, stop_cmd, f"Stop container '{container_name}' before deletion")
 
             # Remove container
-            remove_cmd = f"{docker_sudo}docker rm {container_name}"
+            remove_cmd = f"{docker_sudo}docker rm {shlex.quote(container_name)}"
             exit_status, stdout_text, stderr_text = DeploymentService._execute_command(
                 ssh, remove_cmd, f"Delete container '{container_name}'"
             )
@@ -801,7 +1219,4 @@ class DeploymentService:
                 raise Exception(f"Failed to delete container: {stderr_text}")
             
             return f"Container '{container_name}' deleted successfully."
-        finally:
-            ssh.close()
-            logger.info(f"Closed SSH connection to {target.address}")
 
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+from functools import partial
+from datetime import datetime, timezone
+from deploy_portal_backend.core.config import get_settings
+
+# Log storage: deployment_id -> last deployment_log_lines_max (epoch ns, level, message)
+# entries. Tuples of ints/strs are much smaller than dicts of formatted strings;
+# they're shaped for the API (UTC ISO 8601) on read.
+DEPLOYMENT_LOGS: defaultdict[int, deque[tuple[int, str, str]]] = defaultdict(
+    partial(deque, maxlen=get_settings().deployment_log_lines_max)
+)
+
+# Written from deployment worker threads while request handlers read
+_logs_lock = threading.Lock()
+
+# Live log streams: deployment_id -> (event loop, queue) per connected client.
+# Closed deployments won't log again; their streams get a None sentinel.
+_subscribers: defaultdict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+_closed: set[int] = set()
+
+_now_ns = time.time_ns
+
+
+def format_log_entry(entry: tuple[int, str, str]) -> dict[str, str]:
+    """Shape a stored log entry for the API."""
+    timestamp_ns, level, message = entry
+    timestamp = datetime.fromtimestamp(timestamp_ns / 1e9, tz=timezone.utc)
+    return {"timestamp": timestamp.isoformat(), "level": level, "message": message}
+
+
+def add_deployment_log(deployment_id: int, level: str, message: str):
+    """Add a log entry for a deployment."""
+    entry = (_now_ns(), level, message)
+    with _logs_lock:
+        DEPLOYMENT_LOGS[deployment_id].append(entry)
+        # Entries are usually added from deployment worker threads, so hand
+        # them to each subscriber's event loop thread-safely
+        for loop, queue in _subscribers.get(deployment_id, ()):
+            loop.call_soon_threadsafe(queue.put_nowait, entry)
+
+
+def add_deployment_logs(deployment_id: int, entries: list[tuple[str, str]]):
+    """Add several (level, message) log entries for a deployment at once."""
+    now_ns = _now_ns()
+    stamped = [(now_ns, level, message) for level, message in entries]
+    with _logs_lock:
+        DEPLOYMENT_LOGS[deployment_id].extend(stamped)
+        for loop, queue in _subscribers.get(deployment_id, ()):
+            # One wakeup per subscriber for the whole batch
+            loop.call_soon_threadsafe(_put_all, queue, stamped)
+
+
+def _put_all(queue: asyncio.Queue, entries: list[tuple[int, str, str]]):
+    for entry in entries:
+        queue.put_nowait(entry)
+
+
+def read_deployment_logs(deployment_id: int) -> list[dict[str, str]]:
+    """Return a deployment's log entries in API shape."""
+    with _logs_lock:
+        # .get() so reading an unknown id doesn't create an empty log
+        entries = list(DEPLOYMENT_LOGS.get(deployment_id, ()))
+
+    return [format_log_entry(entry) for entry in entries]
+
+
+def close_deployment_logs(deployment_id: int):
+    """Mark a deployment's log as complete and end its live streams."""
+    with _logs_lock:
+        _closed.add(deployment_id)
+        for loop, queue in _subscribers.get(deployment_id, ()):
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+
+def subscribe_deployment_logs(deployment_id: int) -> tuple[asyncio.Queue, list[dict[str, str]]]:
+    """Register a live log stream; returns its queue and the entries logged so far.
+
+    The queue receives new entries, then None once the log is closed. Must be
+    called from the event loop that will consume the queue.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    with _logs_lock:
+        _subscribers[deployment_id].add((asyncio.get_running_loop(), queue))
+        entries = list(DEPLOYMENT_LOGS.get(deployment_id, ()))
+        if deployment_id in _closed:
+            queue.put_nowait(None)
+    return queue, [format_log_entry(entry) for entry in entries]
+
+
+def unsubscribe_deployment_logs(deployment_id: int, queue: asyncio.Queue):
+    """Remove a live log stream registered by subscribe_deployment_logs."""
+    with _logs_lock:
+        subscribers = _subscribers.get(deployment_id)
+        if subscribers is None:
+            return
+        subscribers.discard((asyncio.get_running_loop(), queue))
+        if not subscribers:
+            del _subscribers[deployment_id]
+
+
+def discard_deployment_logs(deployment_id: int):
+    """Drop all log entries for a deployment."""
+    with _logs_lock:
+        DEPLOYMENT_LOGS.pop(deployment_id, None)
+        _closed.discard(deployment_id)
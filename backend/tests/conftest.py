@@ -0,0 +1,16 @@
+import httpx
+import pytest
+from deploy_portal_backend.main import app
+
+
+@pytest.fixture
+def anyio_backend():
+    """Run the async tests on asyncio only."""
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """HTTP client that calls the app in-process over ASGI, with no socket in between."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
@@ -0,0 +1,72 @@
+from contextlib import nullcontext
+from datetime import datetime, timezone
+import pytest
+from deploy_portal_backend.core.cache import cache, make_key
+from deploy_portal_backend.models.deployment import DeploymentApplyRequest
+from deploy_portal_backend.models.target import Target
+from deploy_portal_backend.services import async_deployment
+from deploy_portal_backend.services.deployment import DeploymentService
+
+pytestmark = pytest.mark.anyio
+
+
+def make_target(target_id):
+    return Target(id=target_id, name=f"VM {target_id}", address=f"192.0.2.{target_id}", ssh_key_path="/key", created_at=datetime.now(timezone.utc))
+
+
+async def test_deploy_many_groups_by_target_and_keeps_job_order(monkeypatch):
+    """Test that jobs are batched per target, results follow job order and a batch failure hits all its jobs."""
+    batches = {}
+
+    def deploy_to_target(target, jobs):
+        batches[target.id] = [(request.container_name, deployment_id) for request, deployment_id in jobs]
+        if target.id == 2:
+            raise ConnectionError("unreachable")
+        return [
+            RuntimeError("run failed") if request.container_name == "bad" else f"{target.id}:{request.container_name}"
+            for request, _ in jobs
+        ]
+
+    monkeypatch.setattr(DeploymentService, "deploy_to_target", staticmethod(deploy_to_target))
+
+    first, second = make_target(1), make_target(2)
+    jobs = [
+        (DeploymentApplyRequest(target_id=1, image="nginx", container_name="web"), first, 10),
+        (DeploymentApplyRequest(target_id=2, image="nginx", container_name="db"), second, 11),
+        (DeploymentApplyRequest(target_id=1, image="nginx", container_name="bad"), first, 12),
+        (DeploymentApplyRequest(target_id=2, image="nginx", container_name="cache"), second, 13),
+        (DeploymentApplyRequest(target_id=1, image="nginx", container_name="api"), first, 14),
+    ]
+    results = await async_deployment.deploy_many(jobs)
+
+    assert batches == {1: [("web", 10), ("bad", 12), ("api", 14)], 2: [("db", 11), ("cache", 13)]}
+    assert results[0] == "1:web"
+    assert isinstance(results[1], ConnectionError)
+    assert isinstance(results[2], RuntimeError)
+    assert results[3] is results[1]
+    assert results[4] == "1:api"
+
+
+async def test_bulk_update_target_env_drops_cached_reads(monkeypatch):
+    """Test that a bulk env update returns per-target results and invalidates each target's cached env."""
+    def execute_script(ssh, steps):
+        failed = "192.0.2.2" in ssh
+        return [(0, ""), (1 if failed else 0, "disk full" if failed else ""), (0, ""), (0, "")]
+
+    monkeypatch.setattr(DeploymentService, "_ssh_session", staticmethod(lambda target: nullcontext(target.address)))
+    monkeypatch.setattr(DeploymentService, "_get_sudo_prefix", staticmethod(lambda ssh, target: ""))
+    monkeypatch.setattr(DeploymentService, "_execute_script", staticmethod(execute_script))
+
+    targets = [make_target(1), make_target(2), make_target(3)]
+    for target in targets:
+        cache.set(make_key("target-env", target.id, "merged"), {"env": {"OLD": "1"}}, 60)
+
+    results = await async_deployment.bulk_update_target_env(targets, {"NEW": "2"})
+
+    assert results[0].startswith("VM environment variables updated")
+    assert isinstance(results[1], Exception) and "disk full" in str(results[1])
+    assert results[2].startswith("VM environment variables updated")
+    assert cache.get(make_key("target-env", 1, "merged")) is None
+    assert cache.get(make_key("target-env", 2, "merged")) == {"env": {"OLD": "1"}}
+    assert cache.get(make_key("target-env", 3, "merged")) is None
+    cache.delete("target-env")
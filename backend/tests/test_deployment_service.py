@@ -0,0 +1,225 @@
+import os
+import socket
+import subprocess
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from deploy_portal_backend.models.deployment import DeploymentApplyRequest
+from deploy_portal_backend.models.target import Target
+from deploy_portal_backend.services import deployment
+from deploy_portal_backend.services.deployment import DeploymentService, _RemoteShell
+
+
+class LocalChannel:
+    """Stand-in for a paramiko channel whose command runs in a local process."""
+
+    def __init__(self, program=None):
+        # Runs instead of the command passed to exec_command, if given
+        self._program = program
+        self.closed = False
+        self.eof_received = False
+        self._buffers = {"stdout": bytearray(), "stderr": bytearray()}
+        self._lock = threading.Lock()
+        self._pumps_left = 2
+        self._wake_read, self._wake_write = socket.socketpair()
+
+    def exec_command(self, command):
+        self._process = subprocess.Popen(
+            ["sh", "-c", self._program or command],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        for name in ("stdout", "stderr"):
+            threading.Thread(target=self._pump, args=(getattr(self._process, name), name), daemon=True).start()
+
+    def _pump(self, stream, name):
+        while chunk := os.read(stream.fileno(), 65536):
+            with self._lock:
+                self._buffers[name] += chunk
+            self._wake_write.send(b"x")
+        with self._lock:
+            self._pumps_left -= 1
+            self.eof_received = self._pumps_left == 0
+        self._wake_write.send(b"x")
+
+    def _take(self, name, size):
+        with self._lock:
+            data = bytes(self._buffers[name][:size])
+            del self._buffers[name][:size]
+            return data
+
+    def fileno(self):
+        return self._wake_read.fileno()
+
+    def recv_ready(self):
+        return bool(self._buffers["stdout"])
+
+    def recv_stderr_ready(self):
+        return bool(self._buffers["stderr"])
+
+    def recv(self, size):
+        return self._take("stdout", size)
+
+    def recv_stderr(self, size):
+        return self._take("stderr", size)
+
+    def sendall(self, data):
+        self._process.stdin.write(data)
+        self._process.stdin.flush()
+
+    def exit_status_ready(self):
+        return self._process.poll() is not None
+
+    def recv_exit_status(self):
+        return self._process.wait()
+
+    def close(self):
+        self.closed = True
+        if self._process.poll() is None:
+            self._process.kill()
+
+
+class LocalSSH:
+    """Stand-in for paramiko.SSHClient; shell_program replaces the persistent shell's command."""
+
+    def __init__(self, shell_program=None):
+        self.shell_program = shell_program
+        self.exec_commands = []
+
+    def get_transport(self):
+        return SimpleNamespace(open_session=lambda: LocalChannel(self.shell_program))
+
+    def exec_command(self, command):
+        self.exec_commands.append(command)
+        channel = LocalChannel()
+        channel.exec_command(command)
+        return None, SimpleNamespace(channel=channel), None
+
+
+@pytest.fixture
+def local_remote(monkeypatch):
+    """Run remote commands in a local sh instead of over SSH."""
+    def run_remote(ssh, command):
+        completed = subprocess.run(["sh", "-c", command], stdin=subprocess.DEVNULL, capture_output=True, timeout=30)
+        return completed.returncode, completed.stdout, completed.stderr
+
+    monkeypatch.setattr(DeploymentService, "_run_remote", staticmethod(run_remote))
+
+
+def test_execute_script_splits_step_output(local_remote):
+    """Test that each step gets its own exit status and output, with or without a trailing newline."""
+    results = DeploymentService._execute_script(None, [
+        ("printf 'FOO=\"bar\"\\nBAZ=qux'", "No trailing newline"),
+        ("echo one; echo two", "Trailing newline"),
+        ("true", "No output"),
+        ("echo oops >&2; (exit 3)", "Failing step"),
+        ("printf last", "Last step"),
+    ])
+    assert results == [
+        (0, 'FOO="bar"\nBAZ=qux'),
+        (0, "one\ntwo"),
+        (0, ""),
+        (3, "oops"),
+        (0, "last"),
+    ]
+
+
+def test_get_target_env_without_trailing_newline(local_remote, monkeypatch, tmp_path):
+    """Test reading an env file whose last line has no newline."""
+    env_file = tmp_path / "environment"
+    env_file.write_text('FOO="bar"\nBAZ=qux')
+    monkeypatch.setattr(DeploymentService, "_get_sudo_prefix", staticmethod(lambda ssh, target: ""))
+    monkeypatch.setattr(DeploymentService, "_ssh_session", staticmethod(lambda target: nullcontext()))
+    original = DeploymentService._execute_script
+    monkeypatch.setattr(DeploymentService, "_execute_script", staticmethod(
+        lambda ssh, steps: original(ssh, [(command.replace("/etc/environment", str(env_file)), description) for command, description in steps])
+    ))
+
+    assert DeploymentService.get_target_env(None, "file") == {"FOO": "bar", "BAZ": "qux"}
+
+    merged = DeploymentService.get_target_env(None, "merged")
+    assert merged["FOO"] == "bar"
+    assert merged["BAZ"] == "qux"
+
+
+
+def test_remote_shell_frames_each_command():
+    """Test that the persistent shell separates stdout, stderr and exit status per command."""
+    shell = _RemoteShell(LocalSSH())
+    try:
+        assert shell.run("echo out; echo err >&2") == (0, b"out\n", b"err\n")
+        assert shell.run("printf 'no newline'; exit 7") == (7, b"no newline", b"")
+        # Commands run in a subshell with stdin from /dev/null
+        assert shell.run("cd /; cat") == (0, b"", b"")
+        assert shell.run("pwd")[1] != b"/\n"
+        assert shell.usable
+    finally:
+        shell.close()
+
+
+def test_run_remote_falls_back_when_shell_does_not_start():
+    """Test that commands use their own channel on hosts where the shell exits immediately."""
+    ssh = LocalSSH(shell_program="exit 127")
+
+    assert DeploymentService._run_remote(ssh, "echo hi; echo err >&2; exit 3") == (3, b"hi\n", b"err\n")
+    assert DeploymentService._run_remote(ssh, "echo again") == (0, b"again\n", b"")
+    assert ssh.exec_commands == ["echo hi; echo err >&2; exit 3", "echo again"]
+
+
+def test_deploy_to_target_shares_one_session(monkeypatch):
+    """Test that deployments to one target share a session and come back in job order."""
+    target = Target(id=1, name="VM", address="192.0.2.10", ssh_key_path="/key", created_at=datetime.now(timezone.utc))
+    shared_ssh = object()
+    sessions, docker_checks, deploy_calls = [], [], []
+
+    @contextmanager
+    def ssh_session(session_target):
+        sessions.append(session_target)
+        yield shared_ssh
+
+    def deploy_once(request, deploy_target, deployment_id, ssh):
+        deploy_calls.append((request.container_name, deployment_id, ssh))
+        if request.container_name == "broken":
+            raise RuntimeError("docker run failed")
+        return f"deployed {request.container_name}"
+
+    monkeypatch.setattr(DeploymentService, "_ssh_session", staticmethod(ssh_session))
+    monkeypatch.setattr(DeploymentService, "_check_and_install_docker", staticmethod(lambda ssh, t: docker_checks.append(ssh)))
+    monkeypatch.setattr(DeploymentService, "_deploy_once", staticmethod(deploy_once))
+
+    jobs = [
+        (DeploymentApplyRequest(target_id=1, image="nginx", container_name=name), deployment_id)
+        for deployment_id, name in enumerate(["web", "broken", "api"], start=1)
+    ]
+    results = DeploymentService.deploy_to_target(target, jobs)
+
+    assert results[0] == "deployed web"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "deployed api"
+    assert sessions == [target]
+    assert docker_checks == [shared_ssh]
+    assert sorted(deploy_calls) == [("api", 3, shared_ssh), ("broken", 2, shared_ssh), ("web", 1, shared_ssh)]
+
+
+@pytest.mark.parametrize(("error", "pooled"), [
+    (FileNotFoundError("Compose file not found"), True),
+    (RuntimeError("docker run failed"), True),
+    (OSError("Socket is closed"), False),
+    (EOFError(), False),
+])
+def test_ssh_session_only_drops_broken_connections(monkeypatch, error, pooled):
+    """Test that a session's connection goes back to the pool unless the error means the connection failed."""
+    target = Target(id=1, name="VM", address="192.0.2.10", ssh_key_path="/key", created_at=datetime.now(timezone.utc))
+    ssh = SimpleNamespace(closed=False)
+    ssh.close = lambda: setattr(ssh, "closed", True)
+    released = []
+    monkeypatch.setattr(deployment._ssh_pool, "acquire", lambda target: ssh)
+    monkeypatch.setattr(deployment._ssh_pool, "release", lambda target, client: released.append(client))
+
+    with pytest.raises(type(error)):
+        with DeploymentService._ssh_session(target):
+            raise error
+
+    assert released == ([ssh] if pooled else [])
+    assert ssh.closed is not pooled
@@ -0,0 +1,46 @@
+import pytest
+from deploy_portal_backend.api.routes_targets import TARGETS
+from deploy_portal_backend.core.cache import cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def target_id(client):
+    """Create a target with an unusable SSH key, removed again after the test."""
+    response = await client.post(
+        "/api/targets",
+        json={
+            "name": "Deploy VM",
+            "address": "192.0.2.10",
+            "ssh_key_path": "/nonexistent/id_ed25519"
+        }
+    )
+    target_id = response.json()["id"]
+    yield target_id
+    TARGETS.pop(target_id, None)
+    cache.delete("targets")
+
+
+async def test_stream_deployment_logs(client, target_id):
+    """Test streaming logs of a deployment until it finishes."""
+    response = await client.post(
+        "/api/deployments/apply",
+        json={"target_id": target_id, "image": "nginx:latest", "container_name": "web"}
+    )
+    assert response.status_code == 201
+    deployment_id = response.json()["id"]
+
+    async with client.stream("GET", f"/api/deployments/{deployment_id}/logs/stream") as stream:
+        lines = [line async for line in stream.aiter_lines() if line]
+
+    assert lines[-2:] == ["event: end", "data: {}"]
+    data_lines = [line for line in lines if line.startswith("data: {\"")]
+    assert len(data_lines) == len((await client.get(f"/api/deployments/{deployment_id}/logs")).json())
+    assert "SSH key not found" in data_lines[-1]
+
+
+async def test_stream_deployment_logs_not_found(client):
+    """Test streaming logs of a non-existent deployment."""
+    response = await client.get("/api/deployments/99999/logs/stream")
+    assert response.status_code == 404
@@ -1,20 +1,18 @@
 import pytest
-from fastapi.testclient import TestClient
-from deploy_portal_backend.main import app
 
-client = TestClient(app)
+pytestmark = pytest.mark.anyio
 
 
-def test_list_targets_empty():
+async def test_list_targets_empty(client):
     """Test listing targets when none exist."""
-    response = client.get("/api/targets")
+    response = await client.get("/api/targets")
     assert response.status_code == 200
     assert response.json() == []
 
 
-def test_create_target():
+async def test_create_target(client):
     """Test creating a target."""
-    response = client.post(
+    response = await client.post(
         "/api/targets",
         json={
             "name": "Test VM",
@@ -29,10 +27,10 @@ def test_create_target():
     assert "created_at" in data
 
 
-def test_get_target():
+async def test_get_target(client):
     """Test getting a target by ID."""
     # Create a target first
-    create_response = client.post(
+    create_response = await client.post(
         "/api/targets",
         json={
             "name": "Test Target",
@@ -42,15 +40,37 @@ def test_get_target():
     target_id = create_response.json()["id"]
     
     # Get the target
-    response = client.get(f"/api/targets/{target_id}")
+    response = await client.get(f"/api/targets/{target_id}")
     assert response.status_code == 200
     data = response.json()
     assert data["id"] == target_id
     assert data["name"] == "Test Target"
 
 
-def test_get_target_not_found():
+async def test_get_target_not_found(client):
     """Test getting a non-existent target."""
-    response = client.get("/api/targets/99999")
+    response = await client.get("/api/targets/99999")
     assert response.status_code == 404
 
+
+
+async def test_list_targets_etag(client):
+    """Test that an unchanged target list returns 304 for a matching ETag."""
+    response = await client.get("/api/targets")
+    etag = response.headers["etag"]
+    
+    cached_response = await client.get("/api/targets", headers={"If-None-Match": etag})
+    assert cached_response.status_code == 304
+    
+    # Creating a target invalidates the cached list
+    await client.post(
+        "/api/targets",
+        json={
+            "name": "ETag VM",
+            "address": "192.168.1.101",
+            "ssh_key_path": "~/.ssh/id_ed25519"
+        }
+    )
+    response = await client.get("/api/targets", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag